@@ -5,7 +5,6 @@ import digitalio
 import busio
 import math
 import pygame
-import time
 import numpy as np
 
 import adafruit_rgb_display.st7735 as ST7735
@@ -22,6 +21,10 @@ DISPLAY_CONFIG = {
     "invert": True
 }
 
+# Telemetry topics rendered (display thread wakes up only when one of them changes)
+TELEMETRY_TOPICS = ("attitude", "altitude", "gps", "analog", "home")
+STALE_REDRAW = 0.5      # sec, redraw without updates so "NO ATT" shows when attitude stops
+
 
 # ---------------------------- GUI Configuration ----------------------------------------
 
@@ -45,7 +48,7 @@ BLACK = (0, 0, 0)
 # Initialize Pygame
 pygame.init()
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
+clock = MSP_Read_pi.FrameClock()
 
 # Load fonts
 font = pygame.font.Font("/boot/firmware/OpenCockpit/ViperDisplay-Bold.ttf",8)
@@ -402,42 +405,44 @@ def draw_center_crosshair():
 # ---------------------------- Render all lines and texts functions ----------------------------------------
 
 # Render HUD lines and texts function
-def render_hud(pitch, roll, yaw, v_speed, alt, speed_3d, sats, course, vbat, current, home_dist, home_dir):
+def render_hud(t):
     
         # Clear screen
         screen.fill(BLACK)
 
-        # Draw horizon lines
-        draw_horizon_lines(pitch, roll, yaw = 0)
+        # Draw horizon lines (skipped with warning text when attitude data is stale)
+        if t.is_stale("roll"):
+            draw_text("NO ATT", CENTER_X - 12, CENTER_Y - 25, align="left", font=font_small)
+        else:
+            draw_horizon_lines(t.pitch, t.roll, yaw = 0)
 
         # Draw center crosshair
         draw_center_crosshair()
 
         # Draw 3D speed meter (left side of HUD)
-        draw_speedmeter(speed_3d)
+        draw_speedmeter(t.speed_3d)
 
         # 3D speed text (left side of HUD)
-        draw_text(f"{int(speed_3d)}", CENTER_X - 42, CENTER_Y, align="right")
+        draw_text(f"{int(t.speed_3d)}", CENTER_X - 42, CENTER_Y, align="right")
 
         # Draw altitude meter (right side of HUD)
-        draw_altmeter(alt)
+        draw_altmeter(t.alt)
 
         # Altitude text (right side of HUD)
-        draw_text(f"{int(alt)}", CENTER_X + 42, CENTER_Y, align="left")
+        draw_text(f"{int(t.alt)}", CENTER_X + 42, CENTER_Y, align="left")
 
         # Info texts (bottom right side of HUD)
-        draw_text(f"BAT {vbat:.1f}V", CENTER_X + 31, CENTER_Y + 30, align="left", font=font_small)
-        draw_text(f"CUR {current:.1f}A", CENTER_X + 31, CENTER_Y + 35, align="left", font=font_small)
-        draw_text(f"HOME {home_dist}m", CENTER_X + 31, CENTER_Y + 40, align="left", font=font_small)
-        draw_text(f"HOME {home_dir}°", CENTER_X + 31, CENTER_Y + 45, align="left", font=font_small)
+        draw_text(f"BAT {t.vbat:.1f}V", CENTER_X + 31, CENTER_Y + 30, align="left", font=font_small)
+        draw_text(f"CUR {t.current:.1f}A", CENTER_X + 31, CENTER_Y + 35, align="left", font=font_small)
+        draw_text(f"HOME {t.home_dist}m", CENTER_X + 31, CENTER_Y + 40, align="left", font=font_small)
+        draw_text(f"HOME {t.home_dir}°", CENTER_X + 31, CENTER_Y + 45, align="left", font=font_small)
 
 
 #---------------------------- Setup for Threading environment & SPI Display ----------------------------------------
 
-# Get MSP data snapshot safely (Prevent data flow interruption in multi-threading environment)
-def get_msp_snapshot(msp):
-    with msp.data_lock:
-        return dict(msp.data)
+# Get MSP data snapshot (copy telemetry into preallocated record without blocking the MSP thread)
+def get_msp_snapshot(msp, record):
+    return msp.telemetry.read_into(record)
 
 # RGB888 to RGB565 conversion function
 def rgb888_to_rgb565(raw, width, height):
@@ -461,26 +466,15 @@ def rgb888_to_rgb565(raw, width, height):
 
 # Main loop with MSP data
 def main(MSP_data):
+    record = MSP_Read_pi.TelemetryRecord()
+
     while True:
         clock.tick(FPS)
 
-        snap = get_msp_snapshot(MSP_Read_pi)
-
-        pitch = snap["pitch"] if snap["pitch"] is not None else 0.0
-        roll  = snap["roll"]  if snap["roll"]  is not None else 0.0
-        yaw   = snap["yaw"]   if snap["yaw"]   is not None else 0.0
-        alt = snap["alt"] if snap["alt"] is not None else 0.0
-        v_speed = snap["v_speed"] if snap["v_speed"] is not None else 0.0
-        speed_3d = snap["speed_3d"] if snap["speed_3d"] is not None else 0.0
-        sats = snap["sats"] if snap["sats"] is not None else 0
-        course = snap["course"] if snap["course"] is not None else 0
-        vbat = snap["vbat"] if snap["vbat"] is not None else 0.0
-        current = snap["current"] if snap["current"] is not None else 0.0
-        home_dist = snap["home_dist"] if snap["home_dist"] is not None else 0
-        home_dir = snap["home_dir"] if snap["home_dir"] is not None else 0
+        get_msp_snapshot(MSP_Read_pi, record)
 
         # Render HUD
-        render_hud(pitch, roll, yaw, v_speed, alt, speed_3d, sats, course, vbat, current, home_dist, home_dir)
+        render_hud(record)
 
         # Get pygame surface data
         raw = pygame.image.tostring(screen, "RGB")
@@ -516,11 +510,11 @@ if __name__ == "__main__":
         invert=True
     )
 
-    t_init = time.time()
+    t_init = MSP_Read_pi.clock.now()
 
     # Generate virtual MSP data for testing
     def virtual_MSP_data():
-        t = time.time()
+        t = MSP_Read_pi.clock.now()
         dt = t - t_init
 
         # Generate virtual MSP data values
@@ -538,15 +532,18 @@ if __name__ == "__main__":
 
         return pitch, roll, yaw, alt, speed_3d, sats, course, vbat, current, home_dist, home_dir
 
+    virtual = MSP_Read_pi.TelemetryRecord()
+
     # Main loop with virtual MSP data values
     while True:
         clock.tick(FPS)
 
         # Get virtual MSP data values
         pitch, roll, yaw, alt, speed_3d, sats, course, vbat, current, home_dist, home_dir = virtual_MSP_data()
+        virtual.set(pitch=pitch, roll=roll, yaw=yaw, alt=alt, speed_3d=speed_3d, sats=sats, course=course, vbat=vbat, current=current, home_dist=home_dist, home_dir=home_dir)
 
         # Render HUD
-        render_hud(pitch, roll, yaw, v_speed, alt, speed_3d, sats, course, vbat, current, home_dist, home_dir)
+        render_hud(virtual)
 
         # Get pygame surface data
         raw = pygame.image.tostring(screen, "RGB")
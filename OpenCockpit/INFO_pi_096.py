@@ -5,7 +5,6 @@ import board
 import digitalio
 import busio
 import math
-import time
 import numpy as np
 
 import adafruit_rgb_display.st7735 as ST7735
@@ -23,6 +22,9 @@ DISPLAY_CONFIG = {
     "invert": False
 }
 
+# Telemetry topics rendered (display thread wakes up only when one of them changes)
+TELEMETRY_TOPICS = ("analog", "rc", "gps")
+
 # Input your battery cell number to claculate cell voltage
 BAT_CELL_NUMBER = 4
 
@@ -49,7 +51,7 @@ CYAN = (0, 169, 183)
 # Initialize Pygame
 pygame.init()
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
+clock = MSP_Read_pi.FrameClock()
 
 # Set surface
 background_surface = pygame.Surface((WIDTH, HEIGHT))
@@ -434,6 +436,33 @@ def draw_throttle_gauge_dynamic(surface, throttle):
     draw_text(surface, f"{int(throttle)}", startx_throttle + 1, starty_throttle + 5, font=font_mid, align="RIGHT", color=GREEN)
 
 
+# ---------------------------- Draw flight metrics function ----------------------------------------
+
+# Set metrics rows (bottom boxes)
+y_metrics_1, y_metrics_2 = CENTER_Y + 44, CENTER_Y + 53
+
+# Draw moving parts (consumed mAh, distance, efficiency, remaining time)
+# (wh_km / time_left None: no estimate yet, shown as --)
+def draw_metrics_dynamic(surface, mah_used, distance, wh_km, time_left):
+    # Left box
+    draw_text(surface, "MAH", 2, y_metrics_1, font=font_small, align="left", color=WHITE)
+    draw_text(surface, f"{int(mah_used)}", CENTER_X - 2, y_metrics_1, font=font_small, align="right", color=GREEN)
+    draw_text(surface, "KM", 2, y_metrics_2, font=font_small, align="left", color=WHITE)
+    draw_text(surface, f"{distance / 1000:.2f}", CENTER_X - 2, y_metrics_2, font=font_small, align="right", color=GREEN)
+
+    # Right box
+    draw_text(surface, "WH/KM", CENTER_X + 2, y_metrics_1, font=font_small, align="left", color=WHITE)
+    draw_text(surface, "--" if wh_km is None else f"{wh_km:.1f}", WIDTH - 2, y_metrics_1, font=font_small,
+              align="right", color=GREEN)
+    draw_text(surface, "TIME", CENTER_X + 2, y_metrics_2, font=font_small, align="left", color=WHITE)
+    if time_left is None:
+        draw_text(surface, "--", WIDTH - 2, y_metrics_2, font=font_small, align="right", color=GREEN)
+    else:
+        minutes, seconds = divmod(int(time_left), 60)
+        draw_text(surface, f"{minutes}:{seconds:02d}", WIDTH - 2, y_metrics_2, font=font_small, align="right",
+                  color=RED if time_left < 60 else GREEN)
+
+
 # ---------------------------- INFO Render Function ----------------------------------------
 
 # Draw fixed parts
@@ -463,22 +492,24 @@ def render_info_fixed():
     draw_text(fixed_surface, "SYS  WARN  NAV  INST  GPS", 40, HEIGHT - 5, font=font_small, align="LEFT", color=CYAN)
 
 # Draw moving parts
-def render_info_dynamic(vbat, current, rssi, throttle):
+def render_info_dynamic(t):
 
     dynamic_surface.fill((0,0,0,0))
 
-    draw_vcell_gauge_dynamic(dynamic_surface, vbat)
-    draw_current_gauge_dynamic(dynamic_surface, current)
-    draw_rssi_gauge_dynamic(dynamic_surface, rssi)
-    draw_throttle_gauge_dynamic(dynamic_surface, throttle)
+    draw_vcell_gauge_dynamic(dynamic_surface, t.vbat)
+    draw_current_gauge_dynamic(dynamic_surface, t.current)
+    draw_rssi_gauge_dynamic(dynamic_surface, t.rssi)
+    draw_throttle_gauge_dynamic(dynamic_surface, t.throttle)
+    draw_metrics_dynamic(dynamic_surface, t.mah_used, t.distance,
+                         t.wh_km if t.is_valid("wh_km") else None,
+                         t.time_left if t.is_valid("time_left") else None)
 
 
 #---------------------------- Setup for Threading environment & SPI Display ----------------------------------------
 
-# Get MSP data snapshot safely (Prevent data flow interruption in multi-threading environment)
-def get_msp_snapshot(msp):
-    with msp.data_lock:
-        return dict(msp.data)
+# Get MSP data snapshot (copy telemetry into preallocated record without blocking the MSP thread)
+def get_msp_snapshot(msp, record):
+    return msp.telemetry.read_into(record)
 
 # RGB888 to RGB565 conversion function
 def rgb888_to_rgb565(raw, width, height):
@@ -503,19 +534,15 @@ def main(MSP_data):
     # Render fixed parts of MFD
     render_info_fixed()
 
+    record = MSP_Read_pi.TelemetryRecord()
+
     while True:
         clock.tick(FPS)
 
-        snap = get_msp_snapshot(MSP_Read_pi)
-
-        # Get MSP data from MSP_Read module
-        vbat = snap["vbat"] if snap["vbat"] is not None else 0.0
-        current = snap["current"] if snap["current"] is not None else 0.0
-        rssi = snap["rssi"] if snap["rssi"] is not None else 0.0
-        throttle = snap["throttle"] if snap["throttle"] is not None else 0.0
+        get_msp_snapshot(MSP_Read_pi, record)
 
         # Render dynamic parts of INFO
-        render_info_dynamic(vbat, current, rssi, throttle)
+        render_info_dynamic(record)
 
         # Set surface order
         screen.blit(background_surface, (0,0)) # bottom surface
@@ -555,11 +582,11 @@ if __name__ == "__main__":
         baudrate=36000000
     )
 
-    t_init = time.time()
+    t_init = MSP_Read_pi.clock.now()
 
     # Generate virtual MSP data for testing
     def virtual_MSP_data():
-        t = time.time()
+        t = MSP_Read_pi.clock.now()
         dt = t - t_init
 
         # Generate virtual MSP data values
@@ -573,6 +600,8 @@ if __name__ == "__main__":
     # Render fixed parts of MFD
     render_info_fixed()
 
+    virtual = MSP_Read_pi.TelemetryRecord()
+
     # Main loop with virtual MSP data values
     while True:    
         clock.tick(FPS)
@@ -604,8 +633,10 @@ if __name__ == "__main__":
         if keys[pygame.K_f]:
             throttle -= 1
 
+        virtual.set(vbat=vbat, current=current, rssi=rssi, throttle=throttle)
+
         # Render dynamic parts of INFO
-        render_info_dynamic(vbat, current, rssi, throttle)
+        render_info_dynamic(virtual)
 
         # Set surface order
         screen.blit(background_surface, (0,0))  # bottom surface
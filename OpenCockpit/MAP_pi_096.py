@@ -5,7 +5,6 @@ import board
 import digitalio
 import busio
 import math
-import time
 import numpy as np
 
 import adafruit_rgb_display.st7735 as ST7735
@@ -22,6 +21,9 @@ DISPLAY_CONFIG = {
     "invert": False
 }
 
+# Telemetry topics rendered (display thread wakes up only when one of them changes)
+TELEMETRY_TOPICS = ("attitude", "gps")
+
 
 # ---------------------------- GUI Configuration ----------------------------------------
 
@@ -44,7 +46,7 @@ WHITE = (255, 255, 255)
 pygame.init()
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 screen.fill(BLACK)
-clock = pygame.time.Clock()
+clock = MSP_Read_pi.FrameClock()
 
 # Load fonts
 font = pygame.font.Font("/boot/firmware/OpenCockpit/ViperDisplay-Bold.ttf", 8)
@@ -160,7 +162,7 @@ def draw_MAP(lat, lon, yaw, sats, course, speed_3d):
         )
 
     # ---------------- Rotate (ROTATE_HZ applied) ----------------
-    now = time.time()
+    now = MSP_Read_pi.clock.now()
     time_ok = (now - last_rotate_time) >= ROTATE_DT
 
     if rotated_cache is None or time_ok:
@@ -198,25 +200,24 @@ def draw_text(text, x, y, align="left", font=font, color=BLACK):
     screen.blit(surf, rect)
 
 # Render MAP function
-def render_map(yaw, v_speed, alt, lat, lon, speed_3d, sats, course, vbat, current, home_dist, home_dir):
+def render_map(t):
 
     # Map rendering logic here
-    draw_MAP(lat, lon, yaw, sats, course, speed_3d)
+    draw_MAP(t.lat, t.lon, t.yaw, t.sats, t.course, t.speed_3d)
 
     # Draw crosshair
     draw_crosshair(screen)
 
     # Draw position text
-    draw_text(f"Lat {lat:.5f}", CENTER_X - 35, CENTER_Y - 70, align="left", font=font_small, color=BLACK)
-    draw_text(f"Lon {lon:.5f}", CENTER_X - 35, CENTER_Y - 65, align="left", font=font_small, color=BLACK)
+    draw_text(f"Lat {t.lat:.5f}", CENTER_X - 35, CENTER_Y - 70, align="left", font=font_small, color=BLACK)
+    draw_text(f"Lon {t.lon:.5f}", CENTER_X - 35, CENTER_Y - 65, align="left", font=font_small, color=BLACK)
 
 
 #---------------------------- Setup for Threading environment & SPI Display ----------------------------------------
 
-# Get MSP data snapshot safely (Prevent data flow interruption in multi-threading environment)
-def get_msp_snapshot(msp):
-    with msp.data_lock:
-        return dict(msp.data)
+# Get MSP data snapshot (copy telemetry into preallocated record without blocking the MSP thread)
+def get_msp_snapshot(msp, record):
+    return msp.telemetry.read_into(record)
 
 # RGB888 to RGB565 conversion function
 def rgb888_to_rgb565(raw, width, height):
@@ -237,27 +238,15 @@ def rgb888_to_rgb565(raw, width, height):
 
 # Main loop with MSP data
 def main(msp_data):
+    record = MSP_Read_pi.TelemetryRecord()
+
     while True:
         clock.tick(FPS)
 
-        snap = get_msp_snapshot(MSP_Read_pi)
-
-        # Get MSP data from MSP_Read module
-        yaw   = snap["yaw"]   if snap["yaw"]   is not None else 0.0
-        alt = snap["alt"] if snap["alt"] is not None else 0.0
-        lat = snap["lat"] if snap["lat"] is not None else (MAP_LAT_TOP + MAP_LAT_BOTTOM) / 2
-        lon = snap["lon"] if snap["lon"] is not None else (MAP_LON_LEFT + MAP_LON_RIGHT) / 2
-        v_speed = snap["v_speed"] if snap["v_speed"] is not None else 0.0
-        speed_3d = snap["speed_3d"] if snap["speed_3d"] is not None else 0.0
-        sats = snap["sats"] if snap["sats"] is not None else 0
-        course = snap["course"] if snap["course"] is not None else 0
-        vbat = snap["vbat"] if snap["vbat"] is not None else 0.0
-        current = snap["current"] if snap["current"] is not None else 0.0
-        home_dist = snap["home_dist"] if snap["home_dist"] is not None else 0
-        home_dir = snap["home_dir"] if snap["home_dir"] is not None else 0
+        get_msp_snapshot(MSP_Read_pi, record)
 
         # Render MAP
-        render_map(yaw, v_speed, alt, lat, lon, speed_3d, sats, course, vbat, current, home_dist, home_dir)
+        render_map(record)
 
         # Get pygame surface data
         raw = pygame.image.tostring(screen, "RGB")
@@ -293,11 +282,11 @@ if __name__ == "__main__":
         baudrate=36000000
 )
 
-    t_init = time.time()
+    t_init = MSP_Read_pi.clock.now()
 
     # Generate virtual MSP data for testing
     def virtual_MSP_data():
-        t = time.time()
+        t = MSP_Read_pi.clock.now()
         dt = t - t_init
 
         # Generate virtual MSP data values
@@ -315,15 +304,18 @@ if __name__ == "__main__":
 
         return yaw, v_speed, alt, lat, lon, speed_3d, sats, course, vbat, current, home_dist, home_dir
     
+    virtual = MSP_Read_pi.TelemetryRecord()
+
     # Main loop with virtual MSP data values
     while True:
         clock.tick(FPS)
 
         # Get virtual MSP data values
         yaw, v_speed, alt, lat, lon, speed_3d, sats, course, vbat, current, home_dist, home_dir = virtual_MSP_data()
+        virtual.set(yaw=yaw, v_speed=v_speed, alt=alt, lat=lat, lon=lon, speed_3d=speed_3d, sats=sats, course=course, vbat=vbat, current=current, home_dist=home_dist, home_dir=home_dir)
 
         # Render MAP
-        render_map(yaw, v_speed, alt, lat, lon, speed_3d, sats, course, vbat, current, home_dist, home_dir)
+        render_map(virtual)
         
         # Get pygame surface data
         raw = pygame.image.tostring(screen, "RGB")
@@ -5,7 +5,6 @@ import board
 import digitalio
 import busio
 import math
-import time
 import numpy as np
 
 import adafruit_rgb_display.st7735 as ST7735
@@ -22,6 +21,9 @@ DISPLAY_CONFIG = {
     "invert": False
 }
 
+# Telemetry topics rendered (display thread wakes up only when one of them changes)
+TELEMETRY_TOPICS = ("attitude", "altitude", "gps", "analog", "home")
+
 
 # ---------------------------- GUI Configuration ----------------------------------------
 
@@ -50,7 +52,7 @@ YELLOW = (255, 255, 0)
 # Initialize Pygame
 pygame.init()
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
+clock = MSP_Read_pi.FrameClock()
 
 # Set surface
 background_surface = pygame.Surface((WIDTH, HEIGHT))
@@ -537,35 +539,34 @@ def render_mfd_fixed():
     draw_heading_fixed(fixed_surface)
 
 # Draw moving parts
-def render_mfd_dynamic(pitch, roll, yaw, v_speed, alt, speed_3d, sats, course, vbat, current, home_dist, home_dir):
+def render_mfd_dynamic(t):
 
     dynamic_surface.fill((0,0,0,0))
 
-    draw_attitude_circle(dynamic_surface, pitch, roll)
-    draw_speed_gauge_dynamic(dynamic_surface, speed_3d)
-    draw_alt_gauge_dynamic(dynamic_surface, alt)
-    draw_heading_dynamic(dynamic_surface, yaw, sats, course, speed_3d)
+    draw_attitude_circle(dynamic_surface, t.pitch, t.roll)
+    draw_speed_gauge_dynamic(dynamic_surface, t.speed_3d)
+    draw_alt_gauge_dynamic(dynamic_surface, t.alt)
+    draw_heading_dynamic(dynamic_surface, t.yaw, t.sats, t.course, t.speed_3d)
 
     # Info texts (top left side of MFD)
     draw_text(dynamic_surface, f"V", CENTER_X - 35, CENTER_Y - 73, font=font_tiny, align="left", color=WHITE)
-    draw_text(dynamic_surface, f"{vbat:.2f}", CENTER_X - 32, CENTER_Y - 73, font=font_tiny, align="left", color=GREEN)
+    draw_text(dynamic_surface, f"{t.vbat:.2f}", CENTER_X - 32, CENTER_Y - 73, font=font_tiny, align="left", color=GREEN)
 
     # Info texts (bottom left side of MFD)
-    draw_text(dynamic_surface, f"SAT {sats:.1f}", CENTER_X - 35, CENTER_Y + 70, font=font_tiny, align="left", color=GREEN)
+    draw_text(dynamic_surface, f"SAT {t.sats:.1f}", CENTER_X - 35, CENTER_Y + 70, font=font_tiny, align="left", color=GREEN)
 
     # Info texts (bottom right side of MFD)
     draw_text(dynamic_surface, f"H-dis", CENTER_X + 18, CENTER_Y + 67, font=font_tiny, align="left", color=WHITE)
     draw_text(dynamic_surface, f"H-dir", CENTER_X + 18, CENTER_Y + 70, font=font_tiny, align="left", color=WHITE)
-    draw_text(dynamic_surface, f"{home_dist}", CENTER_X + 30, CENTER_Y + 67, font=font_tiny, align="left", color=GREEN)
-    draw_text(dynamic_surface, f"{home_dir}", CENTER_X + 30, CENTER_Y + 70, font=font_tiny, align="left", color=GREEN)
+    draw_text(dynamic_surface, f"{t.home_dist}", CENTER_X + 30, CENTER_Y + 67, font=font_tiny, align="left", color=GREEN)
+    draw_text(dynamic_surface, f"{t.home_dir}", CENTER_X + 30, CENTER_Y + 70, font=font_tiny, align="left", color=GREEN)
 
 
 #---------------------------- Setup for Threading environment & SPI Display ----------------------------------------
 
-# Get MSP data snapshot safely (Prevent data flow interruption in multi-threading environment)
-def get_msp_snapshot(msp):
-    with msp.data_lock:
-        return dict(msp.data)
+# Get MSP data snapshot (copy telemetry into preallocated record without blocking the MSP thread)
+def get_msp_snapshot(msp, record):
+    return msp.telemetry.read_into(record)
 
 # RGB888 to RGB565 conversion function
 def rgb888_to_rgb565(raw, width, height):
@@ -590,26 +591,15 @@ def main(MSP_data):
     # Render fixed parts of MFD
     render_mfd_fixed()
 
+    record = MSP_Read_pi.TelemetryRecord()
+
     while True:
         clock.tick(FPS)
 
-        snap = get_msp_snapshot(MSP_Read_pi)
-
-        pitch = snap["pitch"] if snap["pitch"] is not None else 0.0
-        roll  = snap["roll"]  if snap["roll"]  is not None else 0.0
-        yaw   = snap["yaw"]   if snap["yaw"]   is not None else 0.0
-        alt = snap["alt"] if snap["alt"] is not None else 0.0
-        v_speed = snap["v_speed"] if snap["v_speed"] is not None else 0.0
-        speed_3d = snap["speed_3d"] if snap["speed_3d"] is not None else 0.0
-        sats = snap["sats"] if snap["sats"] is not None else 0
-        course = snap["course"] if snap["course"] is not None else 0
-        vbat = snap["vbat"] if snap["vbat"] is not None else 0.0
-        current = snap["current"] if snap["current"] is not None else 0.0
-        home_dist = snap["home_dist"] if snap["home_dist"] is not None else 0
-        home_dir = snap["home_dir"] if snap["home_dir"] is not None else 0
+        get_msp_snapshot(MSP_Read_pi, record)
 
         # Render dynamic parts of MFD
-        render_mfd_dynamic(pitch, roll, yaw, v_speed, alt, speed_3d, sats, course, vbat, current, home_dist, home_dir)
+        render_mfd_dynamic(record)
 
         # Set surface order
         screen.blit(background_surface, (0,0)) # bottom surface
@@ -650,11 +640,11 @@ if __name__ == "__main__":
         baudrate=36000000
     )
 
-    t_init = time.time()
+    t_init = MSP_Read_pi.clock.now()
 
     # Generate virtual MSP data for testing
     def virtual_MSP_data():
-        t = time.time()
+        t = MSP_Read_pi.clock.now()
         dt = t - t_init
 
         # Generate virtual MSP data values
@@ -675,15 +665,18 @@ if __name__ == "__main__":
     # Render fixed parts of MFD
     render_mfd_fixed()
 
+    virtual = MSP_Read_pi.TelemetryRecord()
+
     # Main loop with virtual MSP data values
     while True:
         clock.tick(FPS)
 
         # Get virtual MSP data values
         pitch, roll, yaw, v_speed, alt, speed_3d, sats, course, vbat, current, home_dist, home_dir = virtual_MSP_data()
+        virtual.set(pitch=pitch, roll=roll, yaw=yaw, v_speed=v_speed, alt=alt, speed_3d=speed_3d, sats=sats, course=course, vbat=vbat, current=current, home_dist=home_dist, home_dir=home_dir)
 
         # Render dynamic parts of MFD
-        render_mfd_dynamic(pitch, roll, yaw, v_speed, alt, speed_3d, sats, course, vbat, current, home_dist, home_dir)
+        render_mfd_dynamic(virtual)
 
         # Set surface order
         screen.blit(background_surface, (0,0))  # bottom surface
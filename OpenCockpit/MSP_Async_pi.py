@@ -0,0 +1,169 @@
+import asyncio
+from collections import deque
+
+import serial
+
+import MSP_Read_pi
+from MSP_Read_pi import MSPStreamParser, request_frame, handle_msp_frame, build_schedule
+
+# ---------------------------- Base Configuration ----------------------------------------
+
+# Reply timeout and retry count of each request
+REQUEST_TIMEOUT = 0.1   # sec
+REQUEST_RETRIES = 2
+
+
+# Raised when a request got no reply after all retries
+class MSPTimeoutError(TimeoutError):
+    pass
+
+# Raised when the FC answered a request with an error reply (command not supported)
+class MSPErrorReply(Exception):
+    pass
+
+
+# ---------------------------- Asyncio MSP Client ----------------------------------------
+
+# Asyncio MSP client
+# Several requests can be in flight at once. Replies are matched back to the
+# oldest pending request of the same command ID (FIFO per command).
+# A timed out request leaves a tombstone that absorbs its late reply (for one more
+# timeout), so the late reply does not resolve the retry with a stale payload.
+class AsyncMSPClient:
+
+    def __init__(self, ser):
+        self.ser = ser
+        self.loop = asyncio.get_running_loop()
+        self.parser = MSPStreamParser()
+        self.pending = {}       # cmd -> deque of [future, sent time, suspect] (tombstone: [None, expiry, False])
+
+        # Per-command statistics
+        self.latency = {}       # cmd -> [count, sum, min, max, last] (sec)
+        self.timeouts = {}      # cmd -> timed out request count
+        self.retries = {}       # cmd -> retried request count
+        self.late = {}          # cmd -> replies of timed out requests
+
+        self.loop.add_reader(ser.fileno(), self.on_readable)
+
+    # Open serial port and create client
+    @classmethod
+    async def open(cls, port=MSP_Read_pi.PORT, baudrate=MSP_Read_pi.BAUDRATE):
+        ser = serial.Serial(port, baudrate, timeout=0)
+        return cls(ser)
+
+    def close(self):
+        self.loop.remove_reader(self.ser.fileno())
+        for q in self.pending.values():
+            for fut, _, _ in q:
+                if fut is not None:
+                    fut.cancel()
+        self.pending.clear()
+        self.ser.close()
+
+    # Serial readable callback: store replies and resolve waiting requests
+    def on_readable(self):
+        now = MSP_Read_pi.clock.now()
+        for cmd, p in self.parser.poll(self.ser):
+            handle_msp_frame(cmd, p)
+
+            q = self.pending.get(cmd)
+            while q and q[0][0] is None and q[0][1] < now:
+                q.popleft()     # no late reply came
+            if not q:
+                continue
+            fut, t_sent, _ = q.popleft()
+            if fut is None:
+                # Late reply of a timed out request: the next request becomes suspect
+                # (if it times out too, this reply was its own and it leaves no tombstone)
+                self.late[cmd] = self.late.get(cmd, 0) + 1
+                if q:
+                    q[0][2] = True
+                continue
+            if fut.done():
+                continue
+
+            rtt = now - t_sent
+            st = self.latency.get(cmd)
+            if st is None:
+                self.latency[cmd] = [1, rtt, rtt, rtt, rtt]
+            else:
+                st[0] += 1
+                st[1] += rtt
+                st[2] = min(st[2], rtt)
+                st[3] = max(st[3], rtt)
+                st[4] = rtt
+
+            # Payload view is only valid until next read, so copy it
+            if p is None:
+                fut.set_exception(MSPErrorReply(f"MSP {cmd}: error reply"))
+            else:
+                fut.set_result(bytes(p))
+
+    # Send request and wait for its reply payload (raw bytes)
+    async def request_raw(self, cmd, payload=b"", timeout=REQUEST_TIMEOUT, retries=REQUEST_RETRIES):
+        q = self.pending.setdefault(cmd, deque())
+        for attempt in range(retries + 1):
+            fut = self.loop.create_future()
+            entry = [fut, MSP_Read_pi.clock.now(), False]
+            q.append(entry)
+            self.ser.write(request_frame(cmd, payload))
+            try:
+                return await asyncio.wait_for(fut, timeout)
+            except asyncio.TimeoutError:
+                if entry in q:
+                    if entry[2]:
+                        q.remove(entry)
+                    else:
+                        entry[0] = None
+                        entry[1] = MSP_Read_pi.clock.now() + timeout
+                self.timeouts[cmd] = self.timeouts.get(cmd, 0) + 1
+                if attempt < retries:
+                    self.retries[cmd] = self.retries.get(cmd, 0) + 1
+        raise MSPTimeoutError(f"MSP {cmd}: no reply after {retries + 1} tries")
+
+    # Send request and return decoded reply as {field: value} (raw bytes when layout is unknown)
+    async def request(self, cmd, payload=b"", timeout=REQUEST_TIMEOUT, retries=REQUEST_RETRIES):
+        p = await self.request_raw(cmd, payload, timeout, retries)
+        msg = MSP_Read_pi.MSP_MESSAGES.get(cmd)
+        return msg.as_dict(p) if msg else p
+
+    # Round-trip latency of each command: {cmd: (count, mean, min, max, last)} in sec
+    def latency_stats(self):
+        return {
+            cmd: (n, total / n, lo, hi, last)
+            for cmd, (n, total, lo, hi, last) in self.latency.items()
+        }
+
+
+# ---------------------------- Polling Tasks ----------------------------------------
+
+# Poll one message at its rate (next request is sent after the previous reply)
+async def poll_message(client, cmd, rate_hz):
+    period = 1.0 / rate_hz
+    loop = asyncio.get_running_loop()
+    next_t = loop.time()
+    while True:
+        try:
+            await client.request_raw(cmd)
+        except (MSPTimeoutError, MSPErrorReply):
+            pass
+        next_t = max(next_t + period, loop.time())
+        await asyncio.sleep(next_t - loop.time())
+
+# Poll every scheduled message concurrently
+async def run(port=MSP_Read_pi.PORT, baudrate=MSP_Read_pi.BAUDRATE):
+    client = await AsyncMSPClient.open(port, baudrate)
+    print("MSP async read started.")
+    try:
+        await asyncio.gather(*(poll_message(client, cmd, rate_hz) for cmd, rate_hz, _ in build_schedule()))
+    finally:
+        client.close()
+
+# Thread target (same usage as MSP_Read_pi.main)
+def main():
+    asyncio.run(run())
+
+
+# Execute at develop environment
+if __name__ == "__main__":
+    main()
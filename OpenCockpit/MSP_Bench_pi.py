@@ -0,0 +1,185 @@
+import random
+import selectors
+import struct
+import sys
+import time
+
+import serial
+
+from MSP_Read_pi import (MSPStreamParser, LinkStats, encode_msp_v1, encode_msp_v2, RequestWriter,
+                         link_capacity, MESSAGE_SETS, SUPPORTED_BAUDRATES, REPLY_TIMEOUT,
+                         MSP_ATTITUDE, MSP_ALTITUDE, MSP_RAW_GPS, MSP2_INAV_ANALOG)
+from MSP_Sim_pi import SimFC
+
+# ---------------------------- Base Configuration ----------------------------------------
+
+# Synthetic stream settings
+BENCH_FRAMES = 20000            # frames per stream
+BENCH_CHUNK = 64                # bytes returned per read (like one UART burst)
+BENCH_SEED = 1
+BENCH_ERROR_RATES = (0.0, 0.001, 0.01, 0.05)     # corrupted bytes per stream byte
+
+# Link benchmark settings
+LINK_SECONDS = 2.0              # measuring time of each baudrate / message set
+FC_REPLY_DELAY = 0.0003         # sec, FC processing time per request (loopback only)
+
+
+# ---------------------------- Synthetic Stream ----------------------------------------
+
+# In-memory byte source with the serial API used by MSPStreamParser.fill()
+class ByteSource:
+
+    def __init__(self, data, chunk=BENCH_CHUNK):
+        self.data = memoryview(bytes(data))
+        self.pos = 0
+        self.chunk = chunk
+
+    @property
+    def in_waiting(self):
+        return min(self.chunk, len(self.data) - self.pos)
+
+    def readinto(self, out):
+        n = min(len(out), len(self.data) - self.pos)
+        out[:n] = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+# Encode response frame (same layout as request, direction ">")
+def encode_response(cmd, payload):
+    frame = encode_msp_v2(cmd, payload) if cmd > 0xFF else encode_msp_v1(cmd, payload)
+    frame[2] = 0x3E
+    return frame
+
+# Build a stream of typical FC replies, returns (stream, frame count)
+def make_stream(n, rnd):
+    frames = [
+        encode_response(MSP_ATTITUDE, struct.pack("<hhh", 12, -34, 180)),
+        encode_response(MSP_ALTITUDE, struct.pack("<ih", 1234, -5)),
+        encode_response(MSP_RAW_GPS, struct.pack("<BBiiHHHH", 2, 9, 375000000, 1270000000, 50, 120, 900, 110)),
+        encode_response(MSP2_INAV_ANALOG, struct.pack("<BHhIIIIBH", 0, 1610, 1234, 0, 350, 0, 0, 0, 900)),
+    ]
+    stream = bytearray()
+    for _ in range(n):
+        stream += frames[rnd.randrange(len(frames))]
+    return stream
+
+# Overwrite random bytes of stream, "$" is injected often to fake false headers
+def corrupt(stream, rate, rnd):
+    data = bytearray(stream)
+    hits = int(len(data) * rate)
+    for _ in range(hits):
+        data[rnd.randrange(len(data))] = 0x24 if rnd.random() < 0.3 else rnd.randrange(256)
+    return data, hits
+
+
+# ---------------------------- Benchmark ----------------------------------------
+
+# Parse whole stream, returns (frames, seconds, stats)
+def parse_stream(data, chunk=BENCH_CHUNK):
+    src = ByteSource(data, chunk)
+    parser = MSPStreamParser()
+    parser.stats = LinkStats()
+    frames = 0
+    t0 = time.perf_counter()
+    while src.in_waiting:
+        for _ in parser.poll(src):
+            frames += 1
+    return frames, time.perf_counter() - t0, parser.stats
+
+# Resync benchmark: frames recovered and parse throughput at several error rates
+def bench_resync(n=BENCH_FRAMES, rates=BENCH_ERROR_RATES, seed=BENCH_SEED):
+    rnd = random.Random(seed)
+    stream = make_stream(n, rnd)
+    print("stream: %d frames, %d bytes, chunk %d" % (n, len(stream), BENCH_CHUNK))
+    print("%8s %8s %8s %9s %10s %8s %8s %10s" %
+          ("err rate", "hits", "frames", "recovered", "lost/hit", "hdr", "chk", "MB/s"))
+    for rate in rates:
+        data, hits = corrupt(stream, rate, rnd)
+        frames, sec, st = parse_stream(data)
+        lost = n - frames
+        print("%8.3f %8d %8d %8.1f%% %10.2f %8d %8d %10.2f" %
+              (rate, hits, frames, 100.0 * frames / n, lost / hits if hits else 0.0,
+               st.header_error, st.checksum_error, len(data) / sec / 1e6))
+
+
+# ---------------------------- Loopback FC ----------------------------------------
+
+# Simulated FC of link benchmark: zero payloads of real reply size, no faults
+class LoopbackFC(SimFC):
+
+    def __init__(self, baudrate, reply_delay=FC_REPLY_DELAY):
+        super().__init__(baudrate, latency=reply_delay, jitter=0.0, error_rate=0.0, drop_rate=0.0, dropouts=())
+
+
+# ---------------------------- Link Benchmark ----------------------------------------
+
+# Poll ATTITUDE + message set as fast as replies come back, returns result dictionary
+# Every cycle sends the whole set and waits for all replies (or REPLY_TIMEOUT per request),
+# so cycles per second is the highest rate each message can be polled at.
+def bench_message_set(port, baudrate, message_set, seconds=LINK_SECONDS, multi=False):
+    cmds = (MSP_ATTITUDE,) + MESSAGE_SETS[message_set]
+    ser = serial.Serial(port, baudrate, timeout=0)
+    parser = MSPStreamParser()
+    writer = RequestWriter(multi=multi)
+    sel = selectors.DefaultSelector()
+    sel.register(ser.fileno(), selectors.EVENT_READ)
+    now = time.monotonic()
+    stats = parser.stats = LinkStats(now)
+    cycles = 0
+    t_end = now + seconds
+    while now < t_end:
+        writer.write(ser, cmds, now)
+        for cmd in cmds:
+            stats.on_request(cmd, now)
+        waiting = len(cmds)
+        t_timeout = now + REPLY_TIMEOUT * len(cmds)     # FC answers one request at a time
+        while waiting and now < t_timeout:
+            sel.select(t_timeout - now)
+            now = time.monotonic()
+            for cmd, p in writer.expand(parser.poll(ser), now):
+                stats.on_frame(cmd, now)
+                waiting -= 1
+        cycles += 1
+        now = time.monotonic()
+    ser.close()
+
+    s = stats.summary(now)
+    frames = sum(c["frames"] for c in s["commands"].values())
+    rtt = [c["rtt_mean_ms"] for c in s["commands"].values() if c["rtt_mean_ms"] is not None]
+    return {
+        "cycles_hz": cycles / s["seconds"],
+        "fps": frames / s["seconds"],
+        "rx_usage": s["rx_bytes"] / s["seconds"] / link_capacity(baudrate),
+        "rtt_mean_ms": sum(rtt) / len(rtt) if rtt else None,
+        "rtt_max_ms": max(c["rtt_max_ms"] or 0.0 for c in s["commands"].values()),
+        "lost": sum(c["lost"] for c in s["commands"].values()) + stats.checksum_error,
+    }
+
+# Link benchmark of every baudrate and message set
+# port None: pty loopback FC per baudrate / port given: real FC (its MSP port must use each baudrate)
+# multi: request each cycle as one MSP_MULTIPLE_MSP envelope (one round trip per set)
+def bench_link(baudrates=SUPPORTED_BAUDRATES, message_sets=tuple(MESSAGE_SETS), port=None, seconds=LINK_SECONDS, multi=False):
+    print("%8s %-7s %9s %9s %8s %10s %10s %6s" %
+          ("baud", "set", "cycle Hz", "frames/s", "RX use", "rtt mean", "rtt max", "lost"))
+    for baudrate in baudrates:
+        for name in message_sets:
+            fc = None if port else LoopbackFC(baudrate)
+            r = bench_message_set(port or fc.port, baudrate, name, seconds, multi)
+            if fc:
+                fc.close()
+            print("%8d %-7s %9.1f %9.1f %7.1f%% %8.2fms %8.2fms %6d" %
+                  (baudrate, name, r["cycles_hz"], r["fps"], r["rx_usage"] * 100,
+                   r["rtt_mean_ms"] or 0.0, r["rtt_max_ms"], r["lost"]))
+
+
+# python MSP_Bench_pi.py [resync | link [port] | link-multi [port]]
+def main():
+    mode = sys.argv[1] if len(sys.argv) > 1 else "resync"
+    if mode in ("link", "link-multi"):
+        bench_link(port=sys.argv[2] if len(sys.argv) > 2 else None, multi=mode == "link-multi")
+    else:
+        bench_resync()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,51 @@
 import serial
+import os
 import struct
 import time
 import math
+import selectors
+import json
+import re
 import threading
+from collections import deque
 
-data_lock = threading.Lock()
+import numpy as np
 
 # ---------------------------- Base Configuration ----------------------------------------
 
-# Set serial port and baudrate
-PORT = "/dev/ttyS0"
-BAUDRATE = 115200
+# Set serial port and baudrate (environment OPENCOCKPIT_PORT / OPENCOCKPIT_BAUD overrides)
+# Pi: /dev/ttyS0 is the mini UART (baudrate follows core clock),
+#     use /dev/ttyAMA0 (PL011) for 460800 and above
+PORT = os.environ.get("OPENCOCKPIT_PORT", "/dev/ttyS0")
+BAUDRATE = int(os.environ.get("OPENCOCKPIT_BAUD", 115200))
+
+# Baudrates supported by INAV MSP serial ports and tested by MSP_Bench_pi (link benchmark)
+SUPPORTED_BAUDRATES = (115200, 230400, 460800, 921600)
 
 # Frequencies of MSP requests and Display output
 FAST_HZ = 30.0   # ATTITUDE MSP Frequency
 SLOW_HZ = 15.0   # Others MSP Frequency
-OUT_HZ  = 30.0   # Print Frequency
+OUT_HZ  = 30.0   # File record Frequency
+STATUS_HZ = 2.0  # Status line Frequency
 
 FAST_DT = 1.0 / FAST_HZ
 SLOW_DT = 1.0 / SLOW_HZ
 OUT_DT  = 1.0 / OUT_HZ
 
+# Select telemetry protocol read from FC
+# "msp"  : MSP request / response polling
+# "ltm"  : receive-only, INAV pushes Light Telemetry (G/A/S/O frames) without requests
+# "crsf" : receive-only, FC pushes CRSF telemetry (attitude/GPS/battery/vario frames)
+#          (set BAUDRATE to the FC port setting, e.g. 420000 for CRSF)
+TELEMETRY_PROTOCOL = "msp"
+
+# Select telemetry output of MSP thread
+# "off"    : no output (production)
+# "status" : compact status line at STATUS_HZ
+# "file"   : structured records (JSON lines) to SINK_FILE at OUT_HZ
+TELEMETRY_SINK = "off"
+SINK_FILE = "/tmp/opencockpit_telemetry.jsonl"
+
 # MSP IDs (INAV)
 MSP_ATTITUDE   = 108
 MSP_ALTITUDE   = 109
@@ -30,215 +55,1973 @@ MSP_COMP_GPS   = 107
 MSP_CURRENT    = 23
 MSP_RC = 105
 
+# MSPv2 IDs (INAV)
+MSP2_INAV_ANALOG    = 0x2002
+MSP2_INAV_AIR_SPEED = 0x2009
+
+# Multi-request envelope (Betaflight MSP_MULTIPLE_MSP: one request lists MSPv1 IDs,
+# one reply carries every payload as size + data). INAV does not implement it,
+# enable only when the FC firmware answers it.
+MSP_MULTIPLE_MSP = 230
+MSP_MULTI_REQUEST = False
+
+# MSP protocol versions
+MSP_V1 = 1
+MSP_V2 = 2
+
+# Protocol version used to request each command
+# Not listed: MSPv1 (IDs above 255 always use MSPv2)
+MSP_VERSION = {
+    MSP2_INAV_ANALOG: MSP_V2,
+    MSP2_INAV_AIR_SPEED: MSP_V2,
+}
+
+# Select message set polled at SLOW_HZ
+# "legacy" : original MSPv1 requests
+# "inav"   : fewest INAV messages covering the same data fields
+#            (MSP2_INAV_ANALOG replaces MSP_ANALOG + MSP_CURRENT with higher resolution vbat/current and mAh)
+MSP_MESSAGE_SET = "legacy"
+
+MESSAGE_SETS = {
+    "legacy": (MSP_ALTITUDE, MSP_RAW_GPS, MSP_ANALOG, MSP_CURRENT, MSP_COMP_GPS, MSP_RC),
+    "inav":   (MSP_ALTITUDE, MSP_RAW_GPS, MSP2_INAV_ANALOG, MSP_COMP_GPS, MSP_RC),
+}
+
+# Request rate (Hz) of each message (not listed: SLOW_HZ)
+MSP_RATE_HZ = {
+    MSP_ATTITUDE: FAST_HZ,
+}
+
+# Priority of each message (0 = highest, never deferred / not listed: 2)
+MSP_PRIORITY = {
+    MSP_ATTITUDE: 0,
+    MSP_ALTITUDE: 1,
+    MSP_ANALOG: 1,
+    MSP2_INAV_ANALOG: 1,
+    MSP_RAW_GPS: 2,
+    MSP_COMP_GPS: 2,
+    MSP_RC: 3,
+    MSP_CURRENT: 3,
+}
+
+# Requests of one command in flight at once (not listed: MSP_IN_FLIGHT)
+# A due request is held back while the window is full, until a reply arrives
+# or the oldest request times out (REPLY_TIMEOUT), so requests never queue up in the FC UART.
+MSP_IN_FLIGHT = 1
+MSP_WINDOW = {}
+MSP_TOTAL_IN_FLIGHT = 4     # all commands together (FC answers one request at a time)
+
+# Max share of link capacity used by requested responses (priority 0 is never limited)
+LINK_BUDGET_RATIO = 0.8
+LINK_WINDOW = 1.0   # sec, window of link usage accounting
+
+# Command names (statistics output)
+MSP_NAMES = {
+    MSP_ATTITUDE: "ATTITUDE",
+    MSP_ALTITUDE: "ALTITUDE",
+    MSP_RAW_GPS: "RAW_GPS",
+    MSP_ANALOG: "ANALOG",
+    MSP_COMP_GPS: "COMP_GPS",
+    MSP_CURRENT: "CURRENT",
+    MSP_RC: "RC",
+    MSP2_INAV_ANALOG: "INAV_ANALOG",
+    MSP2_INAV_AIR_SPEED: "INAV_AIR_SPEED",
+}
+
+# Link statistics
+STATS_DUMP_DT = 0.0     # sec, periodic link statistics dump (0 = off)
+REPLY_TIMEOUT = 0.1     # sec, request without reply after this is lost (slot freed, a later reply is late)
+LATENCY_BINS_MS = (2, 5, 10, 20, 50, 100, 200)  # round-trip histogram bin upper edges
+
+# Response payload size of each command (bytes, INAV)
+MSP_RESPONSE_SIZE = {
+    MSP_ATTITUDE: 6,
+    MSP_ALTITUDE: 10,
+    MSP_RAW_GPS: 18,
+    MSP_ANALOG: 7,
+    MSP_CURRENT: 12,
+    MSP_COMP_GPS: 5,
+    MSP_RC: 32,             # 16 channels
+    MSP2_INAV_ANALOG: 24,
+    MSP2_INAV_AIR_SPEED: 4,
+}
+
+
+# ---------------------------- Clock ----------------------------------------
+
+# Wall clock (monotonic seconds, real sleeps)
+class SystemClock:
+
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, sec):
+        if sec > 0:
+            time.sleep(sec)
+
+# Wall clock running speed times faster from start (replay at N x)
+class ScaledClock:
+
+    def __init__(self, speed=1.0, start=0.0):
+        self.speed = speed
+        self.start = start
+        self.t_wall = time.monotonic()
+
+    def now(self):
+        return self.start + (time.monotonic() - self.t_wall) * self.speed
+
+    def sleep(self, sec):
+        if sec > 0:
+            time.sleep(sec / self.speed)
+
+# Simulated clock: time only moves by sleep() / advance(), nothing waits on the wall clock
+# (same inputs give the same timestamps, so replayed runs are bit-identical)
+class SimClock:
+
+    def __init__(self, start=0.0):
+        self.t = start
+
+    def now(self):
+        return self.t
+
+    def sleep(self, sec):
+        if sec > 0:
+            self.t += sec
+
+    def advance(self, sec):
+        self.sleep(sec)
+
+# Frame pacing on a clock (replaces pygame.time.Clock, same tick() behaviour)
+# clock None: module clock at each tick
+class FrameClock:
+
+    def __init__(self, clock=None):
+        self.clock = clock
+        self.last = None
+
+    # Wait until 1 / fps after previous tick, returns milliseconds since previous tick
+    def tick(self, fps=0):
+        c = self.clock or clock
+        now = c.now()
+        if fps > 0 and self.last is not None:
+            c.sleep(self.last + 1.0 / fps - now)
+            now = c.now()
+        dt = 0.0 if self.last is None else now - self.last
+        self.last = now
+        return dt * 1000.0
+
+# Time base of telemetry stamps, ages, attitude and pacing (replaced by set_clock())
+clock = SystemClock()
+
+# Replace module clock (all readers and writers use the new one from their next call)
+def set_clock(c):
+    global clock
+    clock = c
+    return c
+
 
 # ---------------------------- MSP Communication Functions ----------------------------------------
 
-# MSP checksum function
+# MSP checksum function (MSPv1 XOR)
 def msp_checksum(data):
     c = 0
     for b in data:
         c ^= b
     return c
 
-# MSP request function
-def send_msp_request(ser, cmd):
+# Build CRC8/DVB-S2 lookup table (poly 0xD5, used by MSPv2)
+def make_crc8_dvb_s2_table():
+    table = bytearray(256)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0xD5) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table[i] = crc
+    return bytes(table)
+
+CRC8_DVB_S2_TABLE = make_crc8_dvb_s2_table()
+
+# MSPv2 checksum function (table-driven CRC8/DVB-S2)
+def crc8_dvb_s2(data, crc=0):
+    table = CRC8_DVB_S2_TABLE
+    for b in data:
+        crc = table[crc ^ b]
+    return crc
+
+# Get protocol version used to request a command
+def msp_version(cmd):
+    if cmd > 0xFF:
+        return MSP_V2
+    return MSP_VERSION.get(cmd, MSP_V1)
+
+# Encode MSPv1 request frame: $M< size cmd payload checksum
+def encode_msp_v1(cmd, payload=b""):
     frame = bytearray(b"$M<")
-    frame.append(0)
+    frame.append(len(payload))
     frame.append(cmd)
-    frame.append(msp_checksum(frame[3:5]))
-    ser.write(frame)
+    frame += payload
+    frame.append(msp_checksum(frame[3:]))
+    return frame
 
-# MSP response reading function
-def read_msp_response(ser):
-    # Header
-    if ser.read(1) != b"$":
-        return None
-    if ser.read(1) != b"M":
-        return None
-    if ser.read(1) != b">":
-        return None
+# Encode MSPv2 request frame: $X< flag cmd(u16) size(u16) payload crc8
+def encode_msp_v2(cmd, payload=b"", flag=0):
+    frame = bytearray(b"$X<")
+    frame += struct.pack("<BHH", flag, cmd, len(payload))
+    frame += payload
+    frame.append(crc8_dvb_s2(frame[3:]))
+    return frame
 
-    size_b = ser.read(1)
-    if len(size_b) != 1:
-        return None
-    size = size_b[0]
+# Encode request frame with protocol version selected per command
+def encode_msp_request(cmd, payload=b""):
+    if msp_version(cmd) == MSP_V2:
+        return encode_msp_v2(cmd, payload)
+    return encode_msp_v1(cmd, payload)
 
-    cmd_b = ser.read(1)
-    if len(cmd_b) != 1:
-        return None
-    cmd = cmd_b[0]
+# Cached request frames without payload (constant bytes per command)
+REQUEST_FRAMES = {}
 
-    payload = ser.read(size)
-    if len(payload) != size:
-        return None
+# Request frame of a command (built once when payload is empty)
+def request_frame(cmd, payload=b""):
+    if payload:
+        return encode_msp_request(cmd, payload)
+    frame = REQUEST_FRAMES.get(cmd)
+    if frame is None:
+        frame = REQUEST_FRAMES[cmd] = bytes(encode_msp_request(cmd))
+    return frame
 
-    chk_b = ser.read(1)
-    if len(chk_b) != 1:
-        return None
-    checksum = chk_b[0]
+# MSP request function
+def send_msp_request(ser, cmd, payload=b""):
+    ser.write(request_frame(cmd, payload))
 
-    if msp_checksum(bytes([size, cmd]) + payload) != checksum:
-        return None
+# ---------------------------- MSP Request Writer ----------------------------------------
+
+# Request buffer size (all requests of one scheduling tick)
+REQUEST_BUF_SIZE = 256
+
+# Coalesces every request due in one tick into a preallocated buffer sent with one write
+# With multi enabled, MSPv1 requests of the tick are sent as one MSP_MULTIPLE_MSP envelope
+# and its reply is split back into per-command frames by expand().
+class RequestWriter:
+
+    def __init__(self, size=REQUEST_BUF_SIZE, multi=None):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.multi = MSP_MULTI_REQUEST if multi is None else multi
+        self.envelopes = deque()    # (send time, cmds) of envelopes waiting for reply
+
+    # Encode commands into buffer and send them (one write unless buffer is full)
+    def write(self, ser, cmds, now=0.0):
+        buf = self.buf
+        n = 0
+        multi = ()
+        if self.multi:
+            multi = [cmd for cmd in cmds if msp_version(cmd) == MSP_V1]
+            if len(multi) > 1:
+                k = len(multi)
+                buf[0:5] = b"$M<\x00\x00"
+                buf[3] = k
+                buf[4] = MSP_MULTIPLE_MSP
+                buf[5:5 + k] = multi
+                buf[5 + k] = msp_checksum(self.view[3:5 + k])
+                n = 6 + k
+                self.envelopes.append((now, tuple(multi)))
+            else:
+                multi = ()
+        for cmd in cmds:
+            if cmd in multi:
+                continue
+            frame = request_frame(cmd)
+            m = len(frame)
+            if n + m > len(buf):
+                ser.write(self.view[:n])
+                n = 0
+            buf[n:n + m] = frame
+            n += m
+        if n:
+            ser.write(self.view[:n])
+
+    # Pass frames through and split envelope replies into (cmd, payload) frames
+    # (payload None: error reply, or command not supported inside the envelope)
+    def expand(self, frames, now):
+        envelopes = self.envelopes
+        for cmd, p in frames:
+            if cmd != MSP_MULTIPLE_MSP:
+                yield cmd, p
+                continue
+            while envelopes and now - envelopes[0][0] > REPLY_TIMEOUT:
+                envelopes.popleft()
+            if not envelopes:
+                continue
+            _, cmds = envelopes.popleft()
+            if p is None:
+                for sub in cmds:
+                    yield sub, None
+                continue
+            pos = 0
+            for sub in cmds:
+                if pos >= len(p):
+                    break
+                size = p[pos]
+                if pos + 1 + size > len(p):
+                    break
+                yield sub, p[pos + 1:pos + 1 + size] if size else None     # 0: command not supported by FC
+                pos += 1 + size
+
+# ---------------------------- MSP Link Budget ----------------------------------------
+
+# Frame overhead without payload (v1: $M< size cmd chk / v2: $X< flag cmd(2) size(2) crc)
+MSP_V1_OVERHEAD = 6
+MSP_V2_OVERHEAD = 9
+
+# Bytes per second the serial link can carry in each direction (8N1: 10 bits per byte)
+def link_capacity(baudrate=BAUDRATE):
+    return baudrate / 10.0
+
+# Bytes on the wire for one request of a command
+def msp_request_bytes(cmd):
+    return MSP_V2_OVERHEAD if msp_version(cmd) == MSP_V2 else MSP_V1_OVERHEAD
+
+# Bytes on the wire for one response of a command
+def msp_response_bytes(cmd):
+    return msp_request_bytes(cmd) + MSP_RESPONSE_SIZE.get(cmd, 0)
+
+# Link usage of a polling configuration (tx bytes/s, rx bytes/s)
+def link_bytes_per_second(message_set, fast_hz=FAST_HZ, slow_hz=SLOW_HZ):
+    tx = fast_hz * msp_request_bytes(MSP_ATTITUDE)
+    rx = fast_hz * msp_response_bytes(MSP_ATTITUDE)
+    for cmd in MESSAGE_SETS[message_set]:
+        tx += slow_hz * msp_request_bytes(cmd)
+        rx += slow_hz * msp_response_bytes(cmd)
+    return tx, rx
+
+# Print link usage of every message set and the ATTITUDE rate left over
+def print_link_report(baudrate=BAUDRATE):
+    cap = link_capacity(baudrate)
+    print(f"MSP link budget at {baudrate} baud: {cap:.0f} B/s per direction")
+    for name in MESSAGE_SETS:
+        tx, rx = link_bytes_per_second(name)
+        slow_rx = rx - FAST_HZ * msp_response_bytes(MSP_ATTITUDE)
+        max_fast_hz = (cap - slow_rx) / msp_response_bytes(MSP_ATTITUDE)
+        print(
+            f"  {name:<7} {len(MESSAGE_SETS[name])} msgs | "
+            f"TX {tx:.0f} B/s  RX {rx:.0f} B/s ({rx / cap * 100:.1f}%) | "
+            f"max ATTITUDE {max_fast_hz:.0f} Hz"
+        )
+
+# ---------------------------- MSP Request Scheduler ----------------------------------------
+
+# Build (cmd, rate Hz, priority) list of ATTITUDE + selected message set
+def build_schedule(message_set=MSP_MESSAGE_SET):
+    schedule = []
+    for cmd in (MSP_ATTITUDE,) + MESSAGE_SETS[message_set]:
+        schedule.append((cmd, MSP_RATE_HZ.get(cmd, SLOW_HZ), MSP_PRIORITY.get(cmd, 2)))
+    return schedule
+
+# Priority based MSP request scheduler with per-command in-flight window
+# Each message has its own rate, and messages with the same rate are phase shifted
+# so requests are spread evenly over the period instead of sent in one burst.
+# Response bytes are accounted over LINK_WINDOW, and lower priority messages are
+# deferred to the next period when the link budget is used up.
+class MSPScheduler:
+
+    def __init__(self, schedule, now, baudrate=BAUDRATE, budget_ratio=LINK_BUDGET_RATIO):
+        self.entries = []   # [next_due, priority, cmd, period, window, holding]
+        self.budget = link_capacity(baudrate) * budget_ratio * LINK_WINDOW
+        self.capacity = link_capacity(baudrate) * LINK_WINDOW
+        self.sent = deque()     # (time, response bytes)
+        self.used = 0
+        self.deferred = {}      # cmd -> deferred request count
+        self.inflight = {}      # cmd -> deque of unanswered requests [send time, cmd, live, suspect]
+        self.order = deque()    # every request in send order (timed out ones too, for late replies)
+        self.total = 0          # unanswered requests of all commands
+        self.held = {}          # cmd -> requests held back by full window
+        self.timeouts = {}      # cmd -> requests given up without reply
+        self.late = {}          # cmd -> replies of requests already given up
+
+        by_rate = {}
+        for cmd, rate_hz, priority in schedule:
+            by_rate.setdefault(rate_hz, []).append((priority, cmd))
+
+        for rate_hz, group in by_rate.items():
+            period = 1.0 / rate_hz
+            group.sort()
+            for k, (priority, cmd) in enumerate(group):
+                self.entries.append([now + period * k / len(group), priority, cmd, period, MSP_WINDOW.get(cmd, MSP_IN_FLIGHT), False])
+                self.deferred[cmd] = 0
+                self.inflight[cmd] = deque()
+                self.held[cmd] = 0
+                self.timeouts[cmd] = 0
+                self.late[cmd] = 0
+
+        self.entries.sort(key=lambda e: e[1])
+
+    # Drop link accounting older than LINK_WINDOW
+    def expire(self, now):
+        sent = self.sent
+        while sent and now - sent[0][0] >= LINK_WINDOW:
+            self.used -= sent.popleft()[1]
+
+    # Get commands due now, most important first
+    def due(self, now):
+        self.expire(now)
+        # Timed out requests are forgotten after another REPLY_TIMEOUT (no late reply expected)
+        order = self.order
+        while order and not order[0][2] and now - order[0][0] >= 2 * REPLY_TIMEOUT:
+            order.popleft()
+        cmds = []
+        for e in self.entries:
+            next_due, priority, cmd, period, window, _ = e
+            if now < next_due:
+                continue
+
+            # Window full: give up oldest request if timed out, else hold this one
+            q = self.inflight[cmd]
+            while q and now - q[0][0] >= REPLY_TIMEOUT:
+                req = q.popleft()
+                req[2] = False              # stays in order: its reply may still come late
+                if req[3]:
+                    req[1] = None           # its reply may have been taken as late: never match it
+                self.total -= 1
+                self.timeouts[cmd] += 1
+            if len(q) >= window or self.total >= MSP_TOTAL_IN_FLIGHT:
+                if not e[5]:
+                    e[5] = True
+                    self.held[cmd] += 1
+                continue
+            e[5] = False
+
+            # Next slot (skip missed slots instead of bursting to catch up)
+            e[0] = next_due + period
+            if e[0] <= now:
+                e[0] = now + period
+
+            cost = msp_response_bytes(cmd)
+            if priority > 0 and self.used + cost > self.budget:
+                self.deferred[cmd] += 1
+                continue
+
+            self.sent.append((now, cost))
+            self.used += cost
+            req = [now, cmd, True, False]
+            q.append(req)
+            order.append(req)
+            self.total += 1
+            cmds.append(cmd)
+        return cmds
+
+    # Reply received, matched to the oldest request of the command in send order
+    # The FC answers in request order, so older requests of other commands got no reply:
+    # their slots are freed now. A reply of a timed out request is late and does not free
+    # the slot of a newer request. That newer request becomes suspect: if it times out, the
+    # late reply was its own (older request dropped) and it is not matched again.
+    # Returns True (slot freed), False (late reply) or None (no request, e.g. push telemetry)
+    def on_reply(self, cmd):
+        order = self.order
+        for k, req in enumerate(order):
+            if req[1] == cmd:
+                break
+        else:
+            return None
+        for _ in range(k):
+            req = order.popleft()
+            if req[2]:
+                self.release(req)
+                self.timeouts[req[1]] += 1
+        req = order.popleft()
+        if req[2]:
+            self.release(req)
+            return True
+        self.late[cmd] += 1
+        q = self.inflight[cmd]
+        if q:
+            q[0][3] = True
+        return False
+
+    # Free slot of an unanswered request (always the oldest of its command)
+    def release(self, req):
+        req[2] = False
+        self.inflight[req[1]].popleft()
+        self.total -= 1
+
+    # Time of next scheduled request or in-flight timeout (inf when nothing is scheduled)
+    # Held requests wake the loop by their reply (serial readiness), not by time
+    def next_deadline(self):
+        t = math.inf
+        full = self.total >= MSP_TOTAL_IN_FLIGHT
+        for next_due, _, cmd, _, window, _ in self.entries:
+            q = self.inflight[cmd]
+            if q:
+                t = min(t, q[0][0] + REPLY_TIMEOUT)
+            if full or len(q) >= window:
+                continue
+            if next_due < t:
+                t = next_due
+        return t
+
+    # {cmd name: (in flight, held, timeouts, late)} of request flow control
+    def flow_summary(self):
+        return {
+            FRAME_NAMES.get(cmd, cmd): (len(self.inflight[cmd]), self.held[cmd], self.timeouts[cmd], self.late[cmd])
+            for cmd in self.inflight
+        }
+
+    # Share of link capacity used by requested responses over LINK_WINDOW
+    def usage(self, now):
+        self.expire(now)
+        return self.used / self.capacity
+
+
+# ---------------------------- MSP Link Statistics ----------------------------------------
+
+# MSP link quality statistics
+# Parser failure counters are incremented by MSPStreamParser (parser.stats = link_stats),
+# request/reply counts and round-trip latency histograms by the MSP loop.
+class LinkStats:
+
+    def __init__(self, now=0.0):
+        self.reset(now)
+
+    # Clear every counter and restart rate measurement
+    def reset(self, now):
+        self.t_start = now
+        self.rx_bytes = 0           # bytes read from serial
+        self.discarded = 0          # bytes skipped while searching for a header
+        self.header_error = 0       # "$" not followed by a valid protocol/direction byte
+        self.checksum_error = 0     # checksum / CRC mismatch
+        self.error_reply = 0        # "!" reply from FC (unsupported command)
+        self.oversize = 0           # frame size larger than receive buffer
+        self.overflow = 0           # receive buffer full inside one frame
+        self.resync = 0             # partially parsed frame abandoned, header search restarted
+        self.frames = {}            # cmd -> valid frames
+        self.requests = {}          # cmd -> sent requests
+        self.lost = {}              # cmd -> requests without reply within REPLY_TIMEOUT
+        self.late = {}              # cmd -> replies after REPLY_TIMEOUT (not matched, no latency)
+        self.pending = {}           # cmd -> deque of request send times
+        self.latency = {}           # cmd -> [histogram counts..., sum (sec), max (sec)]
+
+    # Request sent
+    def on_request(self, cmd, now):
+        self.requests[cmd] = self.requests.get(cmd, 0) + 1
+        q = self.pending.get(cmd)
+        if q is None:
+            q = self.pending[cmd] = deque()
+        while q and now - q[0] > REPLY_TIMEOUT:
+            q.popleft()
+            self.lost[cmd] = self.lost.get(cmd, 0) + 1
+        q.append(now)
+
+    # Valid frame parsed (matched to the oldest pending request of the same command)
+    # late: reply of a request already given up (the pending request is a newer one)
+    def on_frame(self, cmd, now, late=False):
+        self.frames[cmd] = self.frames.get(cmd, 0) + 1
+        if late:
+            self.late[cmd] = self.late.get(cmd, 0) + 1
+            return
+        q = self.pending.get(cmd)
+        if not q:
+            return
+        rtt = now - q.popleft()
+        hist = self.latency.get(cmd)
+        if hist is None:
+            hist = self.latency[cmd] = [0] * (len(LATENCY_BINS_MS) + 1) + [0.0, 0.0]
+        ms = rtt * 1000.0
+        k = 0
+        while k < len(LATENCY_BINS_MS) and ms > LATENCY_BINS_MS[k]:
+            k += 1
+        hist[k] += 1
+        hist[-2] += rtt
+        hist[-1] = max(hist[-1], rtt)
+
+    # Frames per second of one command since last reset
+    def fps(self, cmd, now):
+        dt = now - self.t_start
+        return self.frames.get(cmd, 0) / dt if dt > 0 else 0.0
+
+    # Queryable summary dictionary
+    def summary(self, now):
+        cmds = {}
+        for cmd in sorted(set(self.frames) | set(self.requests)):
+            hist = self.latency.get(cmd)
+            n = sum(hist[:-2]) if hist else 0
+            cmds[FRAME_NAMES.get(cmd, cmd)] = {
+                "requests": self.requests.get(cmd, 0),
+                "frames": self.frames.get(cmd, 0),
+                "lost": self.lost.get(cmd, 0),
+                "late": self.late.get(cmd, 0),
+                "fps": self.fps(cmd, now),
+                "rtt_mean_ms": hist[-2] / n * 1000.0 if n else None,
+                "rtt_max_ms": hist[-1] * 1000.0 if n else None,
+                "rtt_hist": list(hist[:-2]) if hist else None,
+            }
+        return {
+            "seconds": now - self.t_start,
+            "rx_bytes": self.rx_bytes,
+            "discarded": self.discarded,
+            "header_error": self.header_error,
+            "checksum_error": self.checksum_error,
+            "error_reply": self.error_reply,
+            "oversize": self.oversize,
+            "overflow": self.overflow,
+            "resync": self.resync,
+            "commands": cmds,
+        }
+
+    # Print summary
+    def dump(self, now):
+        s = self.summary(now)
+        print(
+            f"MSP link {s['seconds']:.1f}s | RX {s['rx_bytes']} B, skipped {s['discarded']} B | "
+            f"hdr {s['header_error']} chk {s['checksum_error']} err {s['error_reply']} "
+            f"big {s['oversize'] + s['overflow']} resync {s['resync']}"
+        )
+        bins = "/".join(f"<{b}" for b in LATENCY_BINS_MS) + "/more ms"
+        for name, c in s["commands"].items():
+            rtt = f"rtt {c['rtt_mean_ms']:.1f}/{c['rtt_max_ms']:.1f} ms (mean/max) {c['rtt_hist']} {bins}" if c["rtt_hist"] else "rtt -"
+            print(f"  {name:<14} {c['fps']:5.1f} fps  req {c['requests']}  lost {c['lost']}  late {c['late']}  {rtt}")
+
+
+link_stats = LinkStats()
+
+
+# ---------------------------- MSP Stream Parser ----------------------------------------
+
+# Receive buffer size (reused for every read, holds many MSP frames)
+RX_BUF_SIZE = 1024
+
+# MSPv2 header after direction byte: flag(u8) cmd(u16) size(u16)
+MSP_V2_HEADER = struct.Struct("<BHH")
+
+# Largest MSPv2 payload accepted (a larger size field is treated as corruption)
+MAX_V2_PAYLOAD = 512
+
+# Parser states
+ST_IDLE, ST_PROTO, ST_DIR, ST_SIZE, ST_CMD, ST_V2_HEADER, ST_PAYLOAD, ST_CHECKSUM = range(8)
+
+# Streaming MSP response parser (MSPv1 "$M>" and MSPv2 "$X>")
+# Drains every waiting byte with one read into a reusable buffer,
+# then extracts as many complete frames as possible.
+# Parser state is kept between calls, so a frame split over two reads is resumed.
+# Bytes of a frame stay in the buffer until it is validated, so a corrupted frame
+# is abandoned by rescanning from the byte after its "$" without losing the next frame.
+class MSPStreamParser:
+
+    def __init__(self, size=RX_BUF_SIZE, direction=0x3E):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.head = 0           # next byte to parse
+        self.tail = 0           # end of received bytes
+        self.state = ST_IDLE
+        self.start = 0          # buffer index of current frame "$"
+        self.version = MSP_V1   # protocol version of current frame
+        self.error = False      # current frame is an error reply ("!")
+        self.size = 0           # payload size of current frame
+        self.cmd = 0            # command ID of current frame
+        self.frame_start = 0    # buffer index of first checksummed byte
+        self.payload_start = 0  # buffer index of current payload
+        self.stats = None       # LinkStats (optional)
+        self.direction = direction  # accepted direction byte (">" responses, "<" requests for FC simulators)
+
+    # Move unparsed bytes (and the whole current frame) to the front of buffer to make room for new data
+    def compact(self):
+        keep = self.head if self.state == ST_IDLE else self.start
+        if keep == 0:
+            return
+        n = self.tail - keep
+        self.buf[0:n] = self.buf[keep:self.tail]
+        self.head -= keep
+        self.tail = n
+        self.start -= keep
+        self.frame_start -= keep
+        self.payload_start -= keep
+
+    # Abandon current frame and search next header from the byte after its "$"
+    def resync(self):
+        self.head = self.start + 1
+        self.state = ST_IDLE
+        if self.stats:
+            self.stats.resync += 1
+
+    # Read all bytes waiting on serial port (one syscall instead of one per byte)
+    def fill(self, ser):
+        waiting = ser.in_waiting
+        if waiting <= 0:
+            return 0
+        if len(self.buf) - self.tail < waiting:
+            self.compact()
+            if self.tail == len(self.buf) and self.state != ST_IDLE:
+                # Frame fills whole buffer: abandon it, its bytes are rescanned by frames()
+                if self.stats:
+                    self.stats.overflow += 1
+                self.resync()
+                self.compact()
+        n = min(waiting, len(self.buf) - self.tail)
+        got = ser.readinto(self.view[self.tail:self.tail + n]) or 0
+        self.tail += got
+        if self.stats:
+            self.stats.rx_bytes += got
+        return got
+
+    # Extract complete frames from buffered bytes
+    # Yields (cmd, payload) and payload is a memoryview valid until next fill()
+    # (None for an error reply "!": the FC answered but does not support the command)
+    def frames(self):
+        buf = self.buf
+        while True:
+            state = self.state
+
+            if state == ST_IDLE:
+                i = buf.find(b"$", self.head, self.tail)
+                if i < 0:
+                    if self.stats:
+                        self.stats.discarded += self.tail - self.head
+                    self.head = self.tail
+                    return
+                if self.stats:
+                    self.stats.discarded += i - self.head
+                self.start = i
+                self.head = i + 1
+                self.state = ST_PROTO
+                continue
+
+            if self.head >= self.tail:
+                return
+
+            if state == ST_V2_HEADER:
+                # flag(u8) cmd(u16) size(u16)
+                if self.tail - self.head < 5:
+                    return
+                _, self.cmd, self.size = MSP_V2_HEADER.unpack_from(buf, self.head)
+                self.head += 5
+                if self.size > MAX_V2_PAYLOAD or self.size > len(buf) - 9:
+                    if self.stats:
+                        self.stats.oversize += 1
+                    self.resync()
+                    continue
+                self.payload_start = self.head
+                self.state = ST_PAYLOAD
+                continue
+
+            if state == ST_PAYLOAD:
+                if self.tail - self.payload_start < self.size:
+                    self.head = self.tail
+                    return
+                self.head = self.payload_start + self.size
+                self.state = ST_CHECKSUM
+                continue
+
+            b = buf[self.head]
+            self.head += 1
+
+            if state == ST_PROTO:
+                if b == 0x4D:                                   # "M"
+                    self.version = MSP_V1
+                    self.state = ST_DIR
+                elif b == 0x58:                                 # "X"
+                    self.version = MSP_V2
+                    self.state = ST_DIR
+                else:
+                    if self.stats:
+                        self.stats.header_error += 1
+                    self.resync()
+            elif state == ST_DIR:
+                if b == self.direction or b == 0x21:            # ">" or "!"
+                    self.error = b == 0x21
+                    self.frame_start = self.head
+                    self.state = ST_SIZE if self.version == MSP_V1 else ST_V2_HEADER
+                else:
+                    if self.stats:
+                        self.stats.header_error += 1
+                    self.resync()
+            elif state == ST_SIZE:
+                self.size = b
+                self.state = ST_CMD
+            elif state == ST_CMD:
+                self.cmd = b
+                self.payload_start = self.head
+                self.state = ST_PAYLOAD
+            elif state == ST_CHECKSUM:
+                self.state = ST_IDLE
+                checked = self.view[self.frame_start:self.head - 1]
+                if self.version == MSP_V1:
+                    ok = msp_checksum(checked) == b
+                else:
+                    ok = crc8_dvb_s2(checked) == b
+                if not ok:
+                    if self.stats:
+                        self.stats.checksum_error += 1
+                    self.resync()
+                    continue
+                if self.error:
+                    if self.stats:
+                        self.stats.error_reply += 1
+                    yield self.cmd, None
+                    continue
+                yield self.cmd, self.view[self.payload_start:self.payload_start + self.size]
+
+    # Fill buffer from serial and return parsed frames
+    def poll(self, ser):
+        self.fill(ser)
+        return self.frames()
+
+
+# ---------------------------------------- Telemetry Store ----------------------------------------
+
+# RC channel fields (rc1 ~ rc16, 1000 ~ 2000)
+RC_CHANNELS = tuple(f"rc{ch}" for ch in range(1, 17))
+
+# Telemetry fields (slot order of TelemetryStore)
+TELEMETRY_FIELDS = (
+    "roll", "pitch", "yaw",
+    "alt", "v_speed",
+    "lat", "lon",
+    "speed", "sats", "course",
+    "vbat", "current", "mah",
+    "air_speed",
+    "rssi", "throttle",
+    "home_dist", "home_dir",
+    "speed_3d",
+    "gps_alt",
+    "home_lat", "home_lon",
+    "mah_used", "wh_used", "distance", "wh_km", "vbat_rest", "time_left",
+) + RC_CHANNELS
+FIELD_INDEX = {name: i for i, name in enumerate(TELEMETRY_FIELDS)}
+
+# Get slot indexes of field names
+def field_indexes(*names):
+    return tuple(FIELD_INDEX[n] for n in names)
+
+# Get bit mask of field names
+def field_mask(names):
+    mask = 0
+    for n in names:
+        mask |= 1 << FIELD_INDEX[n]
+    return mask
+
+# Topics of the telemetry bus (displays subscribe to the topics they render)
+TOPICS = {
+    "attitude": ("roll", "pitch", "yaw"),
+    "altitude": ("alt", "v_speed", "gps_alt"),
+    "gps":      ("lat", "lon", "speed", "sats", "course", "speed_3d", "air_speed", "distance"),
+    "analog":   ("vbat", "current", "mah", "rssi", "mah_used", "wh_used", "wh_km", "vbat_rest", "time_left"),
+    "rc":       RC_CHANNELS + ("throttle",),
+    "home":     ("home_dist", "home_dir", "home_lat", "home_lon"),
+}
+TOPIC_MASKS = {name: field_mask(fields) for name, fields in TOPICS.items()}
+
+# Default value of each field (applied once when a value is missing or invalid)
+FIELD_DEFAULTS = {
+    "roll": 0.0, "pitch": 0.0, "yaw": 0.0,
+    "alt": 0.0, "v_speed": 0.0,
+    "lat": 36.45325, "lon": 127.40603,
+    "speed": 0.0, "sats": 0, "course": 0,
+    "vbat": 0.0, "current": 0.0, "mah": 0,
+    "air_speed": 0.0,
+    "rssi": 0.0, "throttle": 0.0,
+    "home_dist": 0, "home_dir": 0,
+    "speed_3d": 0.0,
+    "gps_alt": 0,
+    "home_lat": 0.0, "home_lon": 0.0,
+    "mah_used": 0.0, "wh_used": 0.0, "distance": 0.0, "wh_km": 0.0, "vbat_rest": 0.0, "time_left": 0.0,
+}
+FIELD_DEFAULTS.update({name: 0 for name in RC_CHANNELS})
+DEFAULT_VALUES = tuple(FIELD_DEFAULTS[name] for name in TELEMETRY_FIELDS)
+
+# Field is stale when not updated for this long (sec)
+STALE_AGE = 1.0
+STALE_AGE_FIELD = {
+    "roll": 0.3, "pitch": 0.3, "yaw": 0.3,
+}
+STALE_AGES = tuple(STALE_AGE_FIELD.get(name, STALE_AGE) for name in TELEMETRY_FIELDS)
+
+# Smoothing factor of per-field update interval average
+RATE_ALPHA = 0.1
+
+# Derived metrics
+MAX_INTEGRATION_GAP = 1.0       # sec, longer gaps between current samples are skipped (not integrated)
+DISTANCE_MIN_STEP = 2.0         # m, GPS noise floor of distance flown
+EFFICIENCY_MIN_DISTANCE = 100.0 # m, Wh/km shown after this distance
+BATTERY_CELLS = 0               # cell count (0 = from first voltage)
+BATTERY_CAPACITY_MAH = 1500     # pack capacity (0 = voltage based remaining time only)
+BATTERY_USABLE = 0.8            # usable share of capacity
+CELL_FULL_V = 4.35              # V, highest cell voltage (cell count detection)
+CELL_EMPTY_V = 3.3              # V, resting cell voltage at empty
+BATTERY_FORGET = 0.995          # sag regression forgetting factor per sample (~200 samples)
+BATTERY_TREND_FORGET = 0.999    # resting voltage trend forgetting factor per sample (~1000 samples)
+BATTERY_MIN_CURRENT_VAR = 1.0   # A^2, current spread needed to fit internal resistance
+BATTERY_ALPHA = 0.02            # smoothing factor of average current
+
+# Telemetry history (NumPy ring buffer of (time, value) per field, fixed memory)
+# memory = fields x HISTORY_SIZE x 32 bytes (time + value, both mirrored)
+#        = 28 x 4096 x 32 = 3.7 MB, the same after 2 minutes or 2 hours of flight
+HISTORY_SIZE = 4096     # samples per field (~136 s of 30 Hz attitude, ~270 s of 15 Hz data)
+
+# Attitude estimator for renderers faster than the attitude rate
+# "linear"  : interpolate between samples, extrapolate from the last two
+# "predict" : interpolate between samples, extrapolate with least-squares rate of all samples
+# "off"     : latest sample
+ATTITUDE_MODE = "linear"
+ATTITUDE_SAMPLES = 8            # timestamped samples kept
+ATTITUDE_LATENCY = 0.015        # sec, FC sample -> received (FC processing + reply on wire)
+DISPLAY_LATENCY = 0.010         # sec, render -> shown on display (frame conversion + SPI transfer)
+MAX_EXTRAPOLATION = 0.1         # sec, attitude is held after this long without samples
+
+# Fixed-layout telemetry record
+# Every field always holds a usable value (defaults applied at parse time),
+# valid bit i is set when field i came from the FC, and stamp[i] is its last receive time with data
+# (module clock, -inf until received: a clock may start at 0).
+class TelemetryRecord:
+
+    __slots__ = TELEMETRY_FIELDS + ("valid", "stamp")
+
+    def __init__(self):
+        for name, value in zip(TELEMETRY_FIELDS, DEFAULT_VALUES):
+            setattr(self, name, value)
+        self.valid = 0
+        self.stamp = [-math.inf] * len(TELEMETRY_FIELDS)
+
+    # Copy every field from another record
+    def copy_from(self, src):
+        for name in TELEMETRY_FIELDS:
+            setattr(self, name, getattr(src, name))
+        self.valid = src.valid
+        self.stamp[:] = src.stamp
+
+    # Set fields by name (marked valid and stamped now, used by virtual data generators)
+    def set(self, **fields):
+        now = clock.now()
+        for name, value in fields.items():
+            i = FIELD_INDEX[name]
+            setattr(self, name, value)
+            self.valid |= 1 << i
+            self.stamp[i] = now
+
+    # Seconds since field was received (inf when never received)
+    def age(self, name, now=None):
+        if now is None:
+            now = clock.now()
+        return now - self.stamp[FIELD_INDEX[name]]
 
-    return cmd, payload
+    # Check whether field is older than its stale age
+    def is_stale(self, name, now=None):
+        return self.age(name, now) > STALE_AGES[FIELD_INDEX[name]]
 
+    # Check whether field came from the FC
+    def is_valid(self, name):
+        return bool(self.valid >> FIELD_INDEX[name] & 1)
 
-# ---------------------------------------- MSP Data Parsers ----------------------------------------
+    # {field: value} dictionary
+    def as_dict(self):
+        return {name: getattr(self, name) for name in TELEMETRY_FIELDS}
 
-def parse_attitude(p):
-    roll, pitch, yaw = struct.unpack("<hhh", p[:6])
-    return roll/10.0, pitch/10.0, yaw
+# Fixed-capacity ring buffer of (monotonic time, value) samples
+# Every sample is written twice (at i and i + size), so the newest n samples are
+# always one contiguous slice: windows are zero-copy NumPy views and append is O(1).
+# Views are live: the writer may be storing the newest sample while a reader looks at it,
+# and a view kept across frames is overwritten after `size` more samples (copy it to keep it).
+class RingBuffer:
 
-def parse_altitude(p):
-    alt_cm, vario_cm_s, _ = struct.unpack("<ihh", p[:8])
-    return alt_cm/100.0, vario_cm_s/100.0
+    def __init__(self, size=HISTORY_SIZE):
+        self.size = size
+        self.t = np.zeros(2 * size)
+        self.v = np.zeros(2 * size)
+        self.head = 0           # next write index (0 ~ size-1)
+        self.count = 0          # stored samples (up to size)
 
-def parse_gps(p):
-    fix, sats, lat, lon, alt, speed, course = struct.unpack("<BBiiiHH", p[:18])
-    if fix == 0:
+    def __len__(self):
+        return self.count
+
+    # Writer: add sample
+    def append(self, t, v):
+        i = self.head
+        j = i + self.size
+        self.t[i] = self.t[j] = t
+        self.v[i] = self.v[j] = v
+        self.head = i + 1 if i + 1 < self.size else 0
+        if self.count < self.size:
+            self.count += 1
+
+    # Newest n samples (all when None) as (times, values) views, oldest first
+    def view(self, n=None):
+        count = self.count
+        n = count if n is None else min(n, count)
+        end = self.head + self.size
+        return self.t[end - n:end], self.v[end - n:end]
+
+    # Samples of the last `seconds` before now (newest sample time when None)
+    def window(self, seconds, now=None):
+        t, v = self.view()
+        if not len(t):
+            return t, v
+        if now is None:
+            now = t[-1]
+        k = np.searchsorted(t, now - seconds, side="left")
+        return t[k:], v[k:]
+
+    # Newest (time, value) (None when empty)
+    def latest(self):
+        if not self.count:
+            return None
+        i = self.head - 1 + self.size
+        return float(self.t[i]), float(self.v[i])
+
+    # Mean of window (None when empty)
+    def mean(self, seconds, now=None):
+        _, v = self.window(seconds, now)
+        return float(v.mean()) if len(v) else None
+
+    # (min, max) of window (None when empty)
+    def min_max(self, seconds, now=None):
+        _, v = self.window(seconds, now)
+        return (float(v.min()), float(v.max())) if len(v) else None
+
+    # Moving average of n samples over window (array, one value per full n-sample group)
+    def moving_average(self, seconds, n, now=None):
+        _, v = self.window(seconds, now)
+        if len(v) < n:
+            return v[:0]
+        c = np.cumsum(v)
+        c[n:] = c[n:] - c[:-n]
+        return c[n - 1:] / n
+
+    # Per-sample derivative (value per second) over window
+    def derivative(self, seconds, now=None):
+        t, v = self.window(seconds, now)
+        if len(t) < 2:
+            return v[:0]
+        return np.gradient(v, t)
+
+    # Least-squares rate (value per second) over window (None with fewer than 2 samples)
+    def slope(self, seconds, now=None):
+        t, v = self.window(seconds, now)
+        if len(t) < 2:
+            return None
+        dt = t - t.mean()
+        den = float(np.dot(dt, dt))
+        return float(np.dot(dt, v - v.mean())) / den if den > 0 else None
+
+# Fields with history (RC channels excluded: throttle is kept)
+HISTORY_FIELDS = tuple(name for name in TELEMETRY_FIELDS if name not in RC_CHANNELS)
+
+# Subscription to telemetry topics (one per display thread)
+# The writer ORs changed field bits into pending and notifies, wait() sleeps until then.
+class Subscription:
+
+    def __init__(self, store, mask):
+        self.store = store
+        self.mask = mask
+        self.pending = 0
+        self.cond = threading.Condition()
+
+    # Block until a subscribed field changes or timeout (sec, None = forever)
+    # Returns changed field mask (0 on timeout)
+    def wait(self, timeout=None):
+        with self.cond:
+            if not self.pending:
+                self.cond.wait(timeout)
+            changed, self.pending = self.pending, 0
+        return changed
+
+    def close(self):
+        self.store.unsubscribe(self)
+
+# Versioned telemetry store (seqlock)
+# One writer (MSP thread) updates a preallocated record between two sequence bumps.
+# Readers copy the record and retry if the sequence was odd (write in progress) or changed,
+# so the writer never waits for renderers and renderers never block each other.
+# version = seq / 2 tells a renderer whether anything changed since its last frame.
+class TelemetryStore:
+
+    def __init__(self):
+        self.seq = 0
+        self.record = TelemetryRecord()
+
+        # Per-field update statistics (writer only)
+        self.count = [0] * len(TELEMETRY_FIELDS)        # number of updates
+        self.interval = [0.0] * len(TELEMETRY_FIELDS)   # average update interval (sec)
+
+        # Per-field history (None: field has no history)
+        self.history = [RingBuffer() if name in HISTORY_FIELDS else None for name in TELEMETRY_FIELDS]
+
+        # Topic subscriptions (replaced as a whole, so the writer iterates without a lock;
+        # display threads subscribe concurrently, so replacing is done under sub_lock)
+        self.subscribers = ()
+        self.sub_lock = threading.Lock()
+
+    # Writer: publish values of several fields as one update
+    # None means "no data": default value is stored and valid bit is cleared
+    # (stamp, count and rate are kept, so a field without data ages and turns stale)
+    # Returns mask of fields whose value or valid bit changed (for notify)
+    def publish(self, indexes, values, now=None):
+        if now is None:
+            now = clock.now()
+        rec = self.record
+        stamp = rec.stamp
+        count = self.count
+        interval = self.interval
+        history = self.history
+        valid = rec.valid
+        changed = 0
+        self.seq += 1
+        for i, v in zip(indexes, values):
+            name = TELEMETRY_FIELDS[i]
+            if v is None:
+                if valid >> i & 1 or getattr(rec, name) != DEFAULT_VALUES[i]:
+                    changed |= 1 << i
+                setattr(rec, name, DEFAULT_VALUES[i])
+                rec.valid &= ~(1 << i)
+                continue
+            if count[i]:
+                dt = now - stamp[i]
+                interval[i] = dt if count[i] == 1 else interval[i] + RATE_ALPHA * (dt - interval[i])
+            count[i] += 1
+            if not valid >> i & 1 or getattr(rec, name) != v:
+                changed |= 1 << i
+            setattr(rec, name, v)
+            rec.valid |= 1 << i
+            if history[i] is not None:
+                history[i].append(now, v)
+            stamp[i] = now
+        self.seq += 1
+        return changed
+
+    # Reader: subscribe to topics (names of TOPICS)
+    def subscribe(self, *topics):
+        mask = 0
+        for name in topics:
+            mask |= TOPIC_MASKS[name]
+        sub = Subscription(self, mask)
+        with self.sub_lock:
+            self.subscribers += (sub,)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self.sub_lock:
+            self.subscribers = tuple(s for s in self.subscribers if s is not sub)
+
+    # Writer: wake subscribers of changed fields (mask: bits of fields whose value changed)
+    def notify(self, mask):
+        for sub in self.subscribers:
+            if sub.mask & mask:
+                with sub.cond:
+                    sub.pending |= mask & sub.mask
+                    sub.cond.notify()
+
+    # Current version (number of published updates)
+    def version(self):
+        return self.seq >> 1
+
+    # Reader: copy record into preallocated record and return its version
+    def read_into(self, out):
+        while True:
+            seq = self.seq
+            if seq & 1:
+                time.sleep(0)   # let writer finish
+                continue
+            out.copy_from(self.record)
+            if self.seq == seq:
+                return seq >> 1
+
+    # Reader: (version, new record copy)
+    def snapshot(self):
+        out = TelemetryRecord()
+        version = self.read_into(out)
+        return version, out
+
+    # Read one field (single attribute read is atomic)
+    def get(self, name):
+        return getattr(self.record, name)
+
+    # Check whether one field came from the FC
+    def is_valid(self, name):
+        return self.record.is_valid(name)
+
+    # Seconds since one field was received
+    def age(self, name, now=None):
+        return self.record.age(name, now)
+
+    # Check whether one field is older than its stale age
+    def is_stale(self, name, now=None):
+        return self.record.is_stale(name, now)
+
+    # History ring buffer of one field (None when field has no history)
+    def history_of(self, name):
+        return self.history[FIELD_INDEX[name]]
+
+    # Delivered update rate of one field (Hz)
+    def rate(self, name):
+        interval = self.interval[FIELD_INDEX[name]]
+        return 1.0 / interval if interval > 0 else 0.0
+
+    # Names of fields older than their stale age (never received fields included)
+    def stale_fields(self, now=None):
+        if now is None:
+            now = clock.now()
+        return [name for name in TELEMETRY_FIELDS if self.record.is_stale(name, now)]
+
+    # {field: (update count, rate Hz, age sec)} for measuring delivered update rates
+    def field_stats(self, now=None):
+        if now is None:
+            now = clock.now()
         return {
-            "lat": None, "lon": None,
-            "speed": None, "sats": sats,
-            "course": None
+            name: (self.count[i], self.rate(name), self.record.age(name, now))
+            for i, name in enumerate(TELEMETRY_FIELDS)
         }
-    return {
-        "lat": lat / 1e7 if fix >= 2 else None,
-        "lon": lon / 1e7 if fix >= 2 else None,
-        "speed": speed / 100.0 if fix >= 2 else None,
-        "sats": sats, "course": course
-    }
-
-def parse_analog(p):
-    if len(p) < 5:
-        return None, None, None
-    vbat_raw, current_raw, rssi_raw = struct.unpack("<BHH", p[:5])
-    vbat = vbat_raw / 10.0          # V
-    current = current_raw / 100.0   # A
-    rssi = rssi_raw                 # 0 ~ 1023
-    return vbat, current, rssi
-
-def parse_home(p):
-    dist, direction = struct.unpack("<Hh", p[:4])
-    return dist, direction
-
-def parse_rc(p):
-    if len(p) < 32:
+
+
+telemetry = TelemetryStore()
+
+# Great-circle distance (m) and bearing (deg, 0 ~ 360) from point 1 to point 2
+def gps_distance_bearing(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2)**2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2)**2
+    dist = 2 * 6371000.0 * math.asin(math.sqrt(a))
+    y = math.sin(dl) * math.cos(p2)
+    x = math.cos(p1) * math.sin(p2) - math.sin(p1) * math.cos(p2) * math.cos(dl)
+    return dist, math.degrees(math.atan2(y, x)) % 360
+
+
+# ---------------------------------------- Attitude Estimator ----------------------------------------
+
+# Angle a moved next to reference angle (no jump across the +-180 / 0-360 seam)
+def unwrap_angle(a, ref):
+    return ref + (a - ref + 180.0) % 360.0 - 180.0
+
+# Timestamped attitude history with attitude_at(t) for smooth rendering
+# The writer (MSP thread) appends (t, roll, pitch, yaw) with t = receive time - ATTITUDE_LATENCY,
+# and renderers ask attitude_at(now + DISPLAY_LATENCY), so both pipeline ends are compensated.
+# Readers take a tuple copy of the deque, which is atomic against the writer's append.
+class AttitudeEstimator:
+
+    def __init__(self, size=ATTITUDE_SAMPLES, mode=None):
+        self.samples = deque(maxlen=size)
+        self.mode = mode
+
+    # Writer: add sample
+    def add(self, t, roll, pitch, yaw):
+        self.samples.append((t, roll, pitch, yaw))
+
+    # Rates (deg/s) of roll, pitch, yaw by least-squares fit of all samples
+    def fit_rates(self, samples):
+        t0 = samples[-1][0]
+        n = len(samples)
+        mt = sum(s[0] - t0 for s in samples) / n
+        den = sum((s[0] - t0 - mt) ** 2 for s in samples)
+        if den <= 0:
+            return 0.0, 0.0, 0.0
+        rates = []
+        for axis in (1, 2, 3):
+            ref = samples[-1][axis]
+            values = [unwrap_angle(s[axis], ref) for s in samples]
+            mv = sum(values) / n
+            rates.append(sum((s[0] - t0 - mt) * (v - mv) for s, v in zip(samples, values)) / den)
+        return rates
+
+    # (roll, pitch, yaw) at clock time t (None before first sample)
+    def attitude_at(self, t):
+        samples = tuple(self.samples)
+        if not samples:
+            return None
+        mode = self.mode or ATTITUDE_MODE
+        last = samples[-1]
+        if mode == "off" or len(samples) < 2 or t <= samples[0][0]:
+            a = last if mode == "off" or t > samples[0][0] else samples[0]
+            return a[1], a[2], a[3]
+
+        if t >= last[0]:
+            # Extrapolate (held after MAX_EXTRAPOLATION)
+            dt = min(t - last[0], MAX_EXTRAPOLATION)
+            if mode == "predict":
+                rates = self.fit_rates(samples)
+            else:
+                prev = samples[-2]
+                span = last[0] - prev[0]
+                if span <= 0:
+                    return last[1], last[2], last[3]
+                rates = [(unwrap_angle(last[k], prev[k]) - prev[k]) / span for k in (1, 2, 3)]
+            roll = last[1] + rates[0] * dt
+            pitch = last[2] + rates[1] * dt
+            yaw = last[3] + rates[2] * dt
+        else:
+            # Interpolate between the samples around t
+            k = len(samples) - 1
+            while samples[k - 1][0] > t:
+                k -= 1
+            a, b = samples[k - 1], samples[k]
+            f = (t - a[0]) / (b[0] - a[0]) if b[0] > a[0] else 1.0
+            roll = a[1] + (unwrap_angle(b[1], a[1]) - a[1]) * f
+            pitch = a[2] + (b[2] - a[2]) * f
+            yaw = a[3] + (unwrap_angle(b[3], a[3]) - a[3]) * f
+        return (roll + 180.0) % 360.0 - 180.0, pitch, yaw % 360.0
+
+    # Attitude to render now (compensates display latency)
+    def attitude_now(self, now=None):
+        if now is None:
+            now = clock.now()
+        return self.attitude_at(now + DISPLAY_LATENCY)
+
+
+attitude = AttitudeEstimator()
+
+
+# ---------------------------------------- Derived Fields ----------------------------------------
+
+# Derived field: computed from source fields whenever one of them is published
+# inputs / outputs are field names, update(rec, now) returns output values
+# (None: nothing to publish). Each update is O(1): state is kept incrementally.
+class Derivation:
+    inputs = ()
+    outputs = ()
+
+    def update(self, rec, now):
         return None
-    return struct.unpack("<16H", p[:32])
+
+# Runs derivations triggered by published fields, in registration order
+# Outputs of one derivation can trigger derivations registered after it.
+class DerivedPipeline:
+
+    def __init__(self, store):
+        self.store = store
+        self.items = []     # (input mask, output indexes, output mask, derivation)
+
+    # Register derivation (returns it)
+    def add(self, d):
+        outputs = field_indexes(*d.outputs)
+        self.items.append((field_mask(d.inputs), outputs, field_mask(d.outputs), d))
+        return d
+
+    # Writer: run derivations whose inputs are in mask (bits of published fields)
+    # Returns mask of derived fields whose value changed
+    def update(self, mask, now):
+        rec = self.store.record
+        changed = 0
+        for inputs, outputs, out_mask, d in self.items:
+            if inputs & mask:
+                values = d.update(rec, now)
+                if values is not None:
+                    changed |= self.store.publish(outputs, values, now)
+                    mask |= out_mask
+        return changed
+
+# 3D Speed Calculation
+# Ground speed alone is used when no vertical speed is received (LTM has none)
+class Speed3D(Derivation):
+    inputs = ("speed", "v_speed")
+    outputs = ("speed_3d",)
+
+    def update(self, rec, now):
+        if not rec.is_valid("speed"):
+            return (None,)
+        v_speed = rec.v_speed if rec.is_valid("v_speed") else 0.0
+        return (math.sqrt(rec.speed**2 + v_speed**2),)
+
+# Home distance / direction from GPS and home position (for protocols without MSP_COMP_GPS)
+class HomeVector(Derivation):
+    inputs = ("lat", "lon", "home_lat", "home_lon")
+    outputs = ("home_dist", "home_dir")
+
+    def update(self, rec, now):
+        if not (rec.is_valid("lat") and rec.is_valid("home_lat")):
+            return None
+        dist, bearing = gps_distance_bearing(rec.lat, rec.lon, rec.home_lat, rec.home_lon)
+        return int(dist), int(bearing)
+
+# Attitude samples for the estimator (no output field)
+class AttitudeSamples(Derivation):
+    inputs = ("roll",)
+
+    def update(self, rec, now):
+        if rec.is_valid("roll"):
+            attitude.add(now - ATTITUDE_LATENCY, rec.roll, rec.pitch, rec.yaw)
+        return None
+
+# Consumed charge and energy by integrating current (trapezoidal rule)
+class ConsumedEnergy(Derivation):
+    inputs = ("current",)
+    outputs = ("mah_used", "wh_used")
+
+    def __init__(self):
+        self.t_last = None
+        self.i_last = 0.0
+        self.mah = 0.0
+        self.wh = 0.0
+
+    def update(self, rec, now):
+        if not rec.is_valid("current"):
+            self.t_last = None
+            return None
+        i = rec.current
+        dt = math.inf if self.t_last is None else now - self.t_last
+        if dt <= MAX_INTEGRATION_GAP:               # gap after lost samples: skipped
+            amp = (i + self.i_last) / 2
+            self.mah += amp * dt / 3.6                  # A*s -> mAh
+            if rec.is_valid("vbat"):
+                self.wh += rec.vbat * amp * dt / 3600.0
+        self.t_last = now
+        self.i_last = i
+        return self.mah, self.wh
+
+# Distance flown: haversine steps between GPS fixes (steps below DISTANCE_MIN_STEP wait for more movement)
+class DistanceFlown(Derivation):
+    inputs = ("lat", "lon")
+    outputs = ("distance",)
+
+    def __init__(self):
+        self.last = None
+        self.total = 0.0
+
+    def update(self, rec, now):
+        if not rec.is_valid("lat"):
+            return None
+        if self.last is None:
+            self.last = (rec.lat, rec.lon)
+            return (self.total,)
+        step, _ = gps_distance_bearing(self.last[0], self.last[1], rec.lat, rec.lon)
+        if step < DISTANCE_MIN_STEP:
+            return None
+        self.total += step
+        self.last = (rec.lat, rec.lon)
+        return (self.total,)
+
+# Energy efficiency (Wh/km)
+class Efficiency(Derivation):
+    inputs = ("distance", "wh_used")
+    outputs = ("wh_km",)
+
+    def update(self, rec, now):
+        if rec.distance < EFFICIENCY_MIN_DISTANCE or not rec.is_valid("wh_used"):
+            return (None,)
+        return (rec.wh_used / (rec.distance / 1000.0),)
+
+# Exponentially weighted online linear regression y = a + b*x
+class OnlineRegression:
+
+    def __init__(self, forget):
+        self.forget = forget
+        self.w = self.x = self.y = self.xx = self.xy = 0.0
+
+    def add(self, x, y):
+        f = self.forget
+        self.w = self.w * f + 1.0
+        self.x = self.x * f + x
+        self.y = self.y * f + y
+        self.xx = self.xx * f + x * x
+        self.xy = self.xy * f + x * y
+
+    # Variance of x
+    def var_x(self):
+        if self.w <= 0:
+            return 0.0
+        mx = self.x / self.w
+        return self.xx / self.w - mx * mx
+
+    # (intercept, slope), None while x has no spread
+    def fit(self, min_var=1e-9):
+        var = self.var_x()
+        if var < min_var:
+            return None
+        mx, my = self.x / self.w, self.y / self.w
+        slope = (self.xy / self.w - mx * my) / var
+        return my - slope * mx, slope
+
+# Battery model: resting voltage (sag removed) and remaining flight time
+# Sag regression vbat = v_rest - R * current gives the internal resistance R,
+# trend regression v_rest over time gives the discharge rate.
+# Remaining time is the shorter of capacity left / average current and
+# time until v_rest reaches BATTERY_CELLS * CELL_EMPTY_V.
+class BatteryModel(Derivation):
+    inputs = ("vbat", "current")
+    outputs = ("vbat_rest", "time_left")
+
+    def __init__(self):
+        self.sag = OnlineRegression(BATTERY_FORGET)
+        self.trend = OnlineRegression(BATTERY_TREND_FORGET)
+        self.resistance = 0.0       # ohm
+        self.i_avg = 0.0            # A
+        self.t0 = None
+        self.cells = BATTERY_CELLS
+
+    def update(self, rec, now):
+        if not (rec.is_valid("vbat") and rec.is_valid("current")) or rec.vbat <= 0:
+            return None
+        v, i = rec.vbat, rec.current
+        if self.t0 is None:
+            self.t0 = now
+            self.i_avg = i
+        if not self.cells:
+            self.cells = math.ceil(v / CELL_FULL_V)
+
+        self.sag.add(i, v)
+        fit = self.sag.fit(min_var=BATTERY_MIN_CURRENT_VAR)
+        if fit is not None and fit[1] < 0:
+            self.resistance = -fit[1]
+        v_rest = v + self.resistance * i
+        self.trend.add(now - self.t0, v_rest)
+        self.i_avg += BATTERY_ALPHA * (i - self.i_avg)
+
+        times = []
+        mah = rec.mah if rec.is_valid("mah") else rec.mah_used
+        if BATTERY_CAPACITY_MAH > 0 and self.i_avg > 0.5:
+            times.append((BATTERY_CAPACITY_MAH * BATTERY_USABLE - mah) / (self.i_avg / 3.6))
+        trend = self.trend.fit()
+        if trend is not None and trend[1] < 0:
+            times.append((v_rest - self.cells * CELL_EMPTY_V) / -trend[1])
+        time_left = max(0.0, min(times)) if times else None
+        return v_rest, time_left
+
+
+# Derived fields of telemetry store (register custom Derivation with derived.add())
+derived = DerivedPipeline(telemetry)
+derived.add(Speed3D())
+derived.add(HomeVector())
+derived.add(AttitudeSamples())
+derived.add(ConsumedEnergy())
+derived.add(DistanceFlown())
+derived.add(Efficiency())
+derived.add(BatteryModel())
+
+
+# ---------------------------------------- MSP Message Registry ----------------------------------------
+
+# Declarative MSP message layout (also used for LTM / CRSF frames)
+# fields: (field, element, scale) or (field, element, scale, (gate element, minimum))
+#   value = raw[element] / scale (scale None keeps raw integer)
+#   value = None (no data) while raw[gate element] < minimum
+# extend(raw) returns extra elements appended after the unpacked ones (bit fields, offsets)
+# Derived fields of the published fields are updated by the derived pipeline.
+# Struct is compiled once and decode() unpacks straight from the receive buffer
+# into a reused value list, so the receive path creates no per-message dicts.
+class MSPMessage:
+
+    def __init__(self, fmt, fields, extend=None):
+        self.struct = struct.Struct(fmt)
+        self.indexes = field_indexes(*(f[0] for f in fields))
+        self.spec = tuple(
+            (f[1], f[2]) + (f[3] if len(f) > 3 else (None, 0))
+            for f in fields
+        )
+        self.values = [None] * len(fields)
+        self.mask = field_mask(f[0] for f in fields)
+        self.extend = extend
+
+    # Decode payload into value list (every value None when payload is too short)
+    def decode(self, p):
+        values = self.values
+        if len(p) < self.struct.size:
+            for k in range(len(values)):
+                values[k] = None
+            return values
+        raw = self.struct.unpack_from(p)
+        if self.extend:
+            raw += self.extend(raw)
+        for k, (element, scale, gate, minimum) in enumerate(self.spec):
+            if gate is not None and raw[gate] < minimum:
+                values[k] = None
+            elif scale:
+                values[k] = raw[element] / scale
+            else:
+                values[k] = raw[element]
+        return values
+
+    # {field: value} dictionary of payload
+    def as_dict(self, p):
+        return {TELEMETRY_FIELDS[i]: v for i, v in zip(self.indexes, self.decode(p))}
+
+    # Encode payload from {field: value} dictionary (inverse of decode, for FC simulators)
+    # Missing fields and extend() elements are sent as 0, gates are opened for given fields,
+    # payload is zero padded to size (full FC reply size).
+    def encode(self, fields, size=0):
+        raw = list(self.struct.unpack(bytes(self.struct.size)))
+        for i, (element, scale, gate, minimum) in zip(self.indexes, self.spec):
+            value = fields.get(TELEMETRY_FIELDS[i])
+            if value is None or element >= len(raw):
+                continue
+            raw[element] = round(value * scale) if scale else int(value)
+            if gate is not None and gate < len(raw):
+                raw[gate] = max(raw[gate], minimum)
+        payload = self.struct.pack(*raw)
+        return payload + bytes(size - len(payload)) if size > len(payload) else payload
+
+# GPS fix gates (fix type is element 0 of MSP_RAW_GPS)
+GPS_FIX_2D = (0, 2)
+GPS_FIX_ANY = (0, 1)
+
+# Layout of each command (INAV)
+MSP_MESSAGES = {
+    # roll, pitch (0.1 deg), yaw (deg)
+    MSP_ATTITUDE: MSPMessage("<hhh", (
+        ("roll", 0, 10.0), ("pitch", 1, 10.0), ("yaw", 2, None),
+    )),
+    # altitude (cm), vario (cm/s)
+    MSP_ALTITUDE: MSPMessage("<ih", (
+        ("alt", 0, 100.0), ("v_speed", 1, 100.0),
+    )),
+    # fix, sats, lat, lon (1e-7 deg), alt (m), speed (cm/s), course (0.1 deg), hdop
+    MSP_RAW_GPS: MSPMessage("<BBiiHHHH", (
+        ("sats", 1, None),
+        ("lat", 2, 1e7, GPS_FIX_2D), ("lon", 3, 1e7, GPS_FIX_2D),
+        ("gps_alt", 4, None, GPS_FIX_2D), ("speed", 5, 100.0, GPS_FIX_2D),
+        ("course", 6, 10.0, GPS_FIX_ANY),
+    )),
+    # vbat (0.1 V), mAh drawn, rssi (0 ~ 1023), amperage (0.01 A)
+    MSP_ANALOG: MSPMessage("<BHHh", (
+        ("vbat", 0, 10.0), ("mah", 1, None), ("rssi", 2, None), ("current", 3, 100.0),
+    )),
+    # flags, vbat (0.01 V), amperage (0.01 A), power, mAh drawn, mWh drawn, capacity, percentage, rssi
+    MSP2_INAV_ANALOG: MSPMessage("<BHhIIIIBH", (
+        ("vbat", 1, 100.0), ("current", 2, 100.0), ("mah", 4, None), ("rssi", 8, None),
+    )),
+    # airspeed (cm/s)
+    MSP2_INAV_AIR_SPEED: MSPMessage("<I", (
+        ("air_speed", 0, 100.0),
+    )),
+    # distance to home (m), direction to home (deg)
+    MSP_COMP_GPS: MSPMessage("<Hh", (
+        ("home_dist", 0, None), ("home_dir", 1, None),
+    )),
+    # 16 channels (1000 ~ 2000), CH3 = Throttle
+    MSP_RC: MSPMessage("<16H", tuple(
+        (name, ch, None) for ch, name in enumerate(RC_CHANNELS)
+    ) + (("throttle", 2, None),)),
+}
+
+# Store frame into telemetry store (payload is decoded in place)
+# now: receive time (None = clock now, replay passes the recorded time)
+def store_frame(messages, key, p, now=None):
+    msg = messages.get(key)
+    if msg is None or p is None:
+        return
+    if now is None:
+        now = clock.now()
+    changed = telemetry.publish(msg.indexes, msg.decode(p), now)
+    telemetry.notify(changed | derived.update(msg.mask, now))
+
+# Store MSP frame into telemetry store
+def handle_msp_frame(cmd, p, now=None):
+    store_frame(MSP_MESSAGES, cmd, p, now)
+
+
+# ---------------------------------------- Push Telemetry (LTM / CRSF) ----------------------------------------
+
+# LTM frame: "$T" function payload checksum (XOR of payload)
+# Payload size of each function (N / X frames are validated but not stored)
+LTM_PAYLOAD_SIZE = {"G": 14, "A": 6, "S": 7, "O": 14, "N": 6, "X": 6}
+
+# Layout of each LTM frame (INAV, little endian)
+LTM_MESSAGES = {
+    # GPS: lat, lon (1e-7 deg), ground speed (m/s), alt (cm), sats << 2 | fix -> +sats, +fix
+    "G": MSPMessage("<iiBiB", (
+        ("sats", 5, None),
+        ("lat", 0, 1e7, (6, 2)), ("lon", 1, 1e7, (6, 2)),
+        ("speed", 2, None, (6, 2)), ("alt", 3, 100.0),
+    ), extend=lambda r: (r[4] >> 2, r[4] & 3)),
+    # Attitude: pitch, roll, heading (deg)
+    "A": MSPMessage("<hhh", (
+        ("pitch", 0, None), ("roll", 1, None), ("yaw", 2, None),
+    )),
+    # Status: vbat (mV), mAh drawn, rssi (0 ~ 254, stored as 0 ~ 1023), airspeed (m/s), state
+    "S": MSPMessage("<HHBBB", (
+        ("vbat", 0, 1000.0), ("mah", 1, None), ("rssi", 2, 0.25), ("air_speed", 3, None),
+    )),
+    # Origin: home lat, lon (1e-7 deg), alt (cm), osd on, home fix
+    "O": MSPMessage("<iiiBB", (
+        ("home_lat", 0, 1e7, (4, 1)), ("home_lon", 1, 1e7, (4, 1)),
+    )),
+}
+
+# CRSF frame: address length type payload crc8 (DVB-S2 over type + payload, big endian payload)
+CRSF_ADDRESSES = re.compile(b"[\xc8\xea\xee\xec]")
+CRSF_MAX_LENGTH = 62
+
+CRSF_GPS = 0x02
+CRSF_VARIO = 0x07
+CRSF_BATTERY = 0x08
+CRSF_ATTITUDE = 0x1E
+
+# rad * 10000 -> deg
+CRSF_ANGLE_SCALE = 10000.0 * math.pi / 180.0
+
+# GPS fix gate (CRSF sends no fix type: position is used from 4 satellites, element 5)
+CRSF_GPS_FIX = (5, 4)
+
+# Layout of each CRSF frame
+CRSF_MESSAGES = {
+    # lat, lon (1e-7 deg), ground speed (0.1 km/h), heading (0.01 deg), alt (m + 1000), sats -> +alt
+    CRSF_GPS: MSPMessage(">iiHHHB", (
+        ("lat", 0, 1e7, CRSF_GPS_FIX), ("lon", 1, 1e7, CRSF_GPS_FIX), ("speed", 2, 36.0, CRSF_GPS_FIX),
+        ("course", 3, 100.0, CRSF_GPS_FIX), ("gps_alt", 6, None, CRSF_GPS_FIX), ("sats", 5, None),
+    ), extend=lambda r: (r[4] - 1000,)),
+    # vertical speed (cm/s)
+    CRSF_VARIO: MSPMessage(">h", (
+        ("v_speed", 0, 100.0),
+    )),
+    # voltage (0.1 V), current (0.1 A), mAh drawn (u24), remaining (%) -> +mAh
+    CRSF_BATTERY: MSPMessage(">HHBHB", (
+        ("vbat", 0, 10.0), ("current", 1, 10.0), ("mah", 5, None),
+    ), extend=lambda r: (r[2] << 16 | r[3],)),
+    # pitch, roll, yaw (rad * 10000) -> +yaw (deg, 0 ~ 360)
+    CRSF_ATTITUDE: MSPMessage(">hhh", (
+        ("pitch", 0, CRSF_ANGLE_SCALE), ("roll", 1, CRSF_ANGLE_SCALE), ("yaw", 3, None),
+    ), extend=lambda r: (round(r[2] / CRSF_ANGLE_SCALE) % 360,)),
+}
+
+# Frame names (statistics output)
+FRAME_NAMES = dict(MSP_NAMES)
+FRAME_NAMES.update({f: "LTM_" + f for f in LTM_PAYLOAD_SIZE})
+FRAME_NAMES.update({
+    CRSF_GPS: "CRSF_GPS", CRSF_VARIO: "CRSF_VARIO",
+    CRSF_BATTERY: "CRSF_BATTERY", CRSF_ATTITUDE: "CRSF_ATTITUDE",
+})
+
+# Streaming LTM parser (same buffer handling as MSPStreamParser)
+# Frames are short and fixed size, so an incomplete frame is simply rescanned
+# from its "$" on the next call (state stays ST_IDLE).
+class LTMStreamParser(MSPStreamParser):
+
+    # Yields (function, payload) and payload is a memoryview valid until next fill()
+    def frames(self):
+        buf = self.buf
+        while True:
+            i = buf.find(b"$T", self.head, self.tail)
+            if i < 0:
+                # Keep a trailing "$" (may be the start of next frame)
+                end = self.tail - 1 if self.tail > self.head and buf[self.tail - 1] == 0x24 else self.tail
+                if self.stats:
+                    self.stats.discarded += end - self.head
+                self.head = end
+                return
+            if self.stats:
+                self.stats.discarded += i - self.head
+            self.head = i
+            if self.tail - i < 3:
+                return
+            function = chr(buf[i + 2])
+            size = LTM_PAYLOAD_SIZE.get(function)
+            if size is None:
+                if self.stats:
+                    self.stats.header_error += 1
+                    self.stats.resync += 1
+                self.head = i + 1
+                continue
+            if self.tail - i < size + 4:
+                return
+            payload = self.view[i + 3:i + 3 + size]
+            if msp_checksum(payload) != buf[i + 3 + size]:
+                if self.stats:
+                    self.stats.checksum_error += 1
+                    self.stats.resync += 1
+                self.head = i + 1
+                continue
+            self.head = i + 4 + size
+            yield function, payload
+
+# Streaming CRSF parser (same buffer handling as MSPStreamParser)
+class CRSFStreamParser(MSPStreamParser):
+
+    # Yields (frame type, payload) and payload is a memoryview valid until next fill()
+    def frames(self):
+        buf = self.buf
+        while True:
+            m = CRSF_ADDRESSES.search(buf, self.head, self.tail)
+            if m is None:
+                if self.stats:
+                    self.stats.discarded += self.tail - self.head
+                self.head = self.tail
+                return
+            i = m.start()
+            if self.stats:
+                self.stats.discarded += i - self.head
+            self.head = i
+            if self.tail - i < 2:
+                return
+            length = buf[i + 1]     # type + payload + crc
+            if length < 2 or length > CRSF_MAX_LENGTH:
+                if self.stats:
+                    self.stats.header_error += 1
+                    self.stats.resync += 1
+                self.head = i + 1
+                continue
+            if self.tail - i < length + 2:
+                return
+            end = i + 1 + length
+            if crc8_dvb_s2(self.view[i + 2:end]) != buf[end]:
+                if self.stats:
+                    self.stats.checksum_error += 1
+                    self.stats.resync += 1
+                self.head = i + 1
+                continue
+            self.head = end + 1
+            yield buf[i + 2], self.view[i + 3:end]
+
+# Store LTM frame into telemetry store
+def handle_ltm_frame(function, p, now=None):
+    store_frame(LTM_MESSAGES, function, p, now)
+
+# Store CRSF frame into telemetry store
+def handle_crsf_frame(frame_type, p, now=None):
+    store_frame(CRSF_MESSAGES, frame_type, p, now)
+
+# Receive-only protocols: (parser class, frame handler)
+PUSH_PROTOCOLS = {
+    "ltm": (LTMStreamParser, handle_ltm_frame),
+    "crsf": (CRSFStreamParser, handle_crsf_frame),
+}
+
+
+# ---------------------------------------- Telemetry Output ----------------------------------------
+
+# No output (period None: MSP thread never wakes up for output)
+class NullSink:
+    period = None
+
+    def emit(self, now, record, scheduler):
+        pass
+
+    def close(self):
+        pass
+
+# Compact status line on console
+class StatusLineSink:
+
+    def __init__(self, rate_hz=STATUS_HZ):
+        self.period = 1.0 / rate_hz
+
+    def emit(self, now, t, scheduler):
+        print(
+            f"LINK {scheduler.usage(now) * 100:.0f}% ATT {telemetry.rate('roll'):.0f}Hz | "
+            f"R {t.roll:.1f} P {t.pitch:.1f} Y {t.yaw} | "
+            f"ALT {t.alt:.1f} VS {t.v_speed:.1f} SPD {t.speed_3d:.1f} | "
+            f"SAT {t.sats} {t.lat:.5f},{t.lon:.5f} | "
+            f"{t.vbat:.1f}V {t.current:.1f}A RSSI {t.rssi} THR {t.throttle} | "
+            f"HOME {t.home_dist}m {t.home_dir}°"
+        )
+
+    def close(self):
+        pass
+
+# Structured records (one JSON object per line) to file
+class FileSink:
+
+    FLUSH_DT = 1.0
+
+    def __init__(self, path=SINK_FILE, rate_hz=OUT_HZ):
+        self.period = 1.0 / rate_hz
+        self.f = open(path, "a")
+        self.t_flush = 0.0
+
+    def emit(self, now, t, scheduler):
+        rec = t.as_dict()
+        rec["t"] = round(now, 4)
+        rec["valid"] = t.valid
+        rec["link"] = round(scheduler.usage(now), 3)
+        self.f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+        if now - self.t_flush >= self.FLUSH_DT:
+            self.f.flush()
+            self.t_flush = now
+
+    def close(self):
+        self.f.close()
+
+# Create telemetry sink by name
+def make_sink(name=None):
+    if name is None:
+        name = TELEMETRY_SINK
+    if name == "status":
+        return StatusLineSink()
+    if name == "file":
+        return FileSink()
+    return NullSink()
 
 
 # ---------------------------------------- Main ----------------------------------------
 
-data = {
-        "roll": None, "pitch": None, "yaw": None,
-        "alt": None, "v_speed": None,
-        "lat": None, "lon": None,
-        "speed": None, "sats": None, "course": None,
-        "vbat": None, "current": None,
-        "rssi": None, "throttle": None,
-        "home_dist": None, "home_dir": None,
-        "speed_3d": None
-    }
-
-def main():
-    ser = serial.Serial(PORT, BAUDRATE, timeout=0.01)
+# recorder: FlightRecorder of MSP_Record_pi (every validated frame is logged, None = off)
+def main(port=None, baudrate=None, recorder=None):
+    port = port or PORT
+    baudrate = baudrate or BAUDRATE
+    if baudrate not in SUPPORTED_BAUDRATES and TELEMETRY_PROTOCOL == "msp":
+        print(f"Warning: {baudrate} baud is not a standard MSP rate {SUPPORTED_BAUDRATES}")
+
+    # Non-blocking port: reads are driven by selector readiness
+    ser = serial.Serial(port, baudrate, timeout=0)
     time.sleep(0.5)
 
-    print("MSP read and output started.")
+    # MSP polling, or receive-only push protocol (no requests are scheduled)
+    writer = RequestWriter()
+    if TELEMETRY_PROTOCOL == "msp":
+        parser = MSPStreamParser()
+        handle_frame = handle_msp_frame
+        schedule = build_schedule()
+    else:
+        parser_class, handle_frame = PUSH_PROTOCOLS[TELEMETRY_PROTOCOL]
+        parser = parser_class()
+        schedule = ()
+
+    # Wake up when serial bytes arrive
+    sel = selectors.DefaultSelector()
+    sel.register(ser.fileno(), selectors.EVENT_READ)
 
-    t_fast = t_slow = t_out = time.time()
+    sink = make_sink()
+    record = TelemetryRecord()
+    t_flush = recorder.t_flush if recorder else math.inf
+
+    if TELEMETRY_SINK != "off" and schedule:
+        print_link_report(baudrate)
+    print(f"Telemetry read started. ({port} {baudrate} baud, protocol: {TELEMETRY_PROTOCOL}, message set: {MSP_MESSAGE_SET}, output: {TELEMETRY_SINK})")
+
+    now = clock.now()
+    scheduler = MSPScheduler(schedule, now, baudrate)
+    t_out = now + sink.period if sink.period else math.inf
+
+    # Link statistics (parser failures, frame rates, round-trip latency)
+    link_stats.reset(now)
+    parser.stats = link_stats
+    t_stats = now + STATS_DUMP_DT if STATS_DUMP_DT > 0 else math.inf
 
     while True:
-        now = time.time()
-
-        # MSP Requests_Fast Frequency
-        if now - t_fast >= FAST_DT:
-            send_msp_request(ser, MSP_ATTITUDE)
-            t_fast = now
-
-        # MSP Requests_Slow Frequency
-        if now - t_slow >= SLOW_DT:
-            send_msp_request(ser, MSP_ALTITUDE)
-            send_msp_request(ser, MSP_RAW_GPS)
-            send_msp_request(ser, MSP_ANALOG)
-            send_msp_request(ser, MSP_CURRENT)
-            send_msp_request(ser, MSP_COMP_GPS)
-            send_msp_request(ser, MSP_RC)
-            t_slow = now
-
-        # Read Responses
-        read_until = now + 0.005
-        while time.time() < read_until:
-            resp = read_msp_response(ser)
-            if not resp:
-                continue
-
-            cmd, p = resp
-
-            if cmd == MSP_ATTITUDE:
-                roll, pitch, yaw = parse_attitude(p)
-                with data_lock:
-                    data["roll"] = roll
-                    data["pitch"] = pitch
-                    data["yaw"] = yaw
-
-            elif cmd == MSP_ALTITUDE:
-                with data_lock:
-                    data["alt"], data["v_speed"] = parse_altitude(p)
-
-            elif cmd == MSP_RAW_GPS:
-                with data_lock:
-                    data.update(parse_gps(p))
-
-            elif cmd == MSP_ANALOG:
-                with data_lock:
-                    data["vbat"], data["current"], data["rssi"] = parse_analog(p)
-
-            elif cmd == MSP_COMP_GPS:
-                with data_lock:
-                    data["home_dist"], data["home_dir"] = parse_home(p)
-
-            elif cmd == MSP_RC:
-                rc = parse_rc(p)
-                if rc:
-                    with data_lock:
-                        data["throttle"] = rc[2]  # CH3 = Throttle / 1000 ~ 2000
-
-        # Data Output
-        if now - t_out >= OUT_DT:
-            t_out = now
-            
-            # 3D Speed Calculation
-            if data["speed"] is not None and data["v_speed"] is not None:
-                spd_3d = math.sqrt(data["speed"]**2 + data["v_speed"]**2)
-            else:
-                spd_3d = None
-
-            with data_lock:
-                data["speed_3d"] = spd_3d
-
-            print(
-                #f"t_fast:{t_fast:.2f}, t_slow:{t_slow:.2f}, t_out:{t_out:.2f} | "
-                f"ROLL:{data['roll']} deg "
-                f"PITCH:{data['pitch']} deg "
-                f"YAW:{data['yaw']} deg | "
-                f"ALT:{data['alt']} m  "
-                f"V_SPD:{data['v_speed']} m/s | "
-                f"3D_SPD:{data['speed_3d']} m/s | "
-                f"LAT:{data['lat']}  "
-                f"LON:{data['lon']}  "
-                f"GPS_SPD:{data['speed']} m/s  "
-                f"SATS:{data['sats']}  "
-                f"COURSE:{data['course']}° | "
-                f"VBAT:{data['vbat']} V  "
-                f"CURRENT:{data['current']} A | "
-                f"RSSI:{data['rssi']} | "
-                f"THR:{data['throttle']} | "
-                f"HOME:{data['home_dist']} m  "
-                f"{data['home_dir']}°"
-            )
-
-        time.sleep(0.005)
+        now = clock.now()
+
+        # MSP Requests (per-message rate and priority, one write per tick)
+        due = scheduler.due(now)
+        if due:
+            writer.write(ser, due, now)
+            for cmd in due:
+                link_stats.on_request(cmd, now)
+
+        # Telemetry Output
+        if now >= t_out:
+            t_out = max(t_out + sink.period, now)
+            telemetry.read_into(record)
+            sink.emit(now, record, scheduler)
+
+        # Flight Recorder Flush
+        if now >= t_flush:
+            recorder.flush(now)
+            t_flush = recorder.t_flush
+
+        # Link Statistics Output
+        if now >= t_stats:
+            t_stats = max(t_stats + STATS_DUMP_DT, now)
+            link_stats.dump(now)
+            print("  flow (in flight/held/timeouts/late):", scheduler.flow_summary())
+
+        # Sleep until bytes arrive or next request / output is due
+        # (receive-only protocol with no output: nothing is due, wait for bytes only)
+        deadline = min(scheduler.next_deadline(), t_out, t_stats, t_flush)
+        timeout = None if deadline == math.inf else max(0.0, deadline - clock.now())
+        if sel.select(timeout):
+            # Read Responses (all waiting bytes at once)
+            t_rx = clock.now()
+            frames = parser.poll(ser)
+            if writer.multi:
+                frames = writer.expand(frames, t_rx)
+            for cmd, p in frames:
+                if recorder and p is not None:
+                    recorder.record(t_rx, cmd, p)
+                handle_frame(cmd, p)
+                late = scheduler.on_reply(cmd) is False
+                link_stats.on_frame(cmd, t_rx, late)
 
 
 # Execute at develop environment
@@ -0,0 +1,216 @@
+import os
+import struct
+import sys
+import time
+import mmap
+
+import MSP_Read_pi
+from MSP_Read_pi import handle_msp_frame, handle_ltm_frame, handle_crsf_frame, TELEMETRY_PROTOCOL
+
+# ---------------------------- Base Configuration ----------------------------------------
+
+# Flight recorder (every validated frame to a binary log, "" = off)
+RECORDER_FILE = os.environ.get("OPENCOCKPIT_RECORD", "")
+
+
+# ---------------------------- Flight Recorder ----------------------------------------
+
+# Log layout (little endian)
+#   header : magic, version, protocol, start monotonic time, start wall time, end offset, index seconds
+#   index  : RECORDER_INDEX_SECONDS x uint32, offset of first frame of each second (0 = none yet)
+#   frames : monotonic time (double), frame key (uint16), payload size (uint16), payload
+# The end offset is written at every flush, so frames after the last flush are ignored on read.
+RECORDER_MAGIC = b"OCREC"
+RECORDER_VERSION = 1
+RECORDER_HEADER = struct.Struct("<5sB6sddII")
+RECORDER_HEADER_SIZE = 64
+RECORDER_FRAME = struct.Struct("<dHH")
+RECORDER_INDEX_SECONDS = 4 * 3600       # 4 h of index (56 KB)
+RECORDER_INDEX = struct.Struct(f"<{RECORDER_INDEX_SECONDS}I")
+RECORDER_DATA_START = RECORDER_HEADER_SIZE + RECORDER_INDEX.size
+RECORDER_SIZE = 64 * 1024 * 1024        # bytes preallocated (and added when full), ~1 h of 115200 baud
+RECORDER_FLUSH_DT = 1.0                 # sec, mapped pages written to SD card after this
+
+# Append-only frame log through a preallocated memory map
+# record() is only a struct pack and a slice copy into the map (no system call);
+# flush() writes the dirty pages and the end offset once per RECORDER_FLUSH_DT.
+class FlightRecorder:
+
+    def __init__(self, path, protocol=TELEMETRY_PROTOCOL, size=RECORDER_SIZE, now=None):
+        self.t0 = MSP_Read_pi.clock.now() if now is None else now
+        self.protocol = protocol
+        self.f = open(path, "w+b")
+        self.size = max(size, RECORDER_DATA_START + 65536)
+        self.f.truncate(self.size)
+        self.mm = mmap.mmap(self.f.fileno(), self.size)
+        self.pos = RECORDER_DATA_START
+        self.second = -1        # last indexed second
+        self.frames = 0
+        self.t_flush = self.t0 + RECORDER_FLUSH_DT
+        self.write_header()
+
+    def write_header(self):
+        RECORDER_HEADER.pack_into(self.mm, 0, RECORDER_MAGIC, RECORDER_VERSION, self.protocol.encode(),
+                                  self.t0, time.time(), self.pos, RECORDER_INDEX_SECONDS)
+
+    # Append one validated frame (key is MSP command, LTM function or CRSF frame type)
+    def record(self, now, key, p):
+        n = len(p)
+        end = self.pos + RECORDER_FRAME.size + n
+        if end > self.size:
+            self.grow()
+        sec = int(now - self.t0)
+        if sec > self.second and sec < RECORDER_INDEX_SECONDS:
+            # Seconds without frames point to the next frame too
+            for i in range(self.second + 1, sec + 1):
+                struct.pack_into("<I", self.mm, RECORDER_HEADER_SIZE + 4 * i, self.pos)
+            self.second = sec
+        RECORDER_FRAME.pack_into(self.mm, self.pos, now, key if key.__class__ is int else ord(key), n)
+        self.mm[self.pos + RECORDER_FRAME.size:end] = p
+        self.pos = end
+        self.frames += 1
+
+    # Extend file and map by RECORDER_SIZE
+    def grow(self):
+        self.flush()
+        self.size += RECORDER_SIZE
+        self.f.truncate(self.size)
+        self.mm.resize(self.size)
+
+    # Write end offset and dirty pages to disk
+    def flush(self, now=None):
+        struct.pack_into("<I", self.mm, RECORDER_HEADER.size - 8, self.pos)
+        self.mm.flush()
+        if now is not None:
+            self.t_flush = now + RECORDER_FLUSH_DT
+
+    # Flush and cut the file to the recorded length
+    def close(self):
+        self.flush()
+        self.mm.close()
+        self.f.truncate(self.pos)
+        self.f.close()
+
+# Read-only view of a flight log
+# frames(start) seeks through the per-second index, so jumping into a long log is O(1).
+class FlightLog:
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mm)
+        magic, version, protocol, self.t0, self.wall_t0, self.end, seconds = RECORDER_HEADER.unpack_from(self.mm, 0)
+        if magic != RECORDER_MAGIC or version != RECORDER_VERSION:
+            raise ValueError(f"{path} is not a flight log")
+        self.protocol = protocol.rstrip(b"\0").decode()
+        self.end = min(self.end, len(self.mm))
+        self.index = RECORDER_INDEX.unpack_from(self.mm, RECORDER_HEADER_SIZE)
+        self.ltm = self.protocol == "ltm"
+
+    # Recorded length in whole seconds (from the index)
+    @property
+    def duration(self):
+        last = 0
+        for sec, offset in enumerate(self.index):
+            if not offset or offset >= self.end:
+                break
+            last = sec
+        return last + 1
+
+    # Offset of first frame at or after start (sec from beginning of log)
+    def seek(self, start=0.0):
+        sec = int(start)
+        if sec <= 0:
+            return RECORDER_DATA_START
+        if sec >= len(self.index) or not self.index[sec]:
+            return self.end
+        return self.index[sec]
+
+    # Yields (time since start, frame key, payload), payload is a memoryview of the map
+    # (a payload kept after close() holds the map: copy it with bytes() to keep it)
+    def frames(self, start=0.0):
+        mm = self.mm
+        view = self.view
+        pos = self.seek(start)
+        end = self.end
+        t0 = self.t0
+        while pos + RECORDER_FRAME.size <= end:
+            now, key, n = RECORDER_FRAME.unpack_from(mm, pos)
+            pos += RECORDER_FRAME.size
+            if pos + n > end:
+                return
+            if now - t0 >= start:
+                yield now - t0, chr(key) if self.ltm else key, view[pos:pos + n]
+            pos += n
+
+    # Unmap the log (payloads still referenced keep the map alive until they are freed)
+    def close(self):
+        self.view.release()
+        try:
+            self.mm.close()
+        except BufferError:
+            pass
+        self.mm = None
+
+
+# ---------------------------- Flight Replay ----------------------------------------
+
+# Frame handler of each recorded protocol
+REPLAY_HANDLERS = {
+    "msp": handle_msp_frame,
+    "ltm": handle_ltm_frame,
+    "crsf": handle_crsf_frame,
+}
+
+# Feed a recorded flight into the telemetry store (same path as live frames)
+# The clock's time line is flight time (sec from start of log): frames are stamped with
+# their recorded time, so rates, derived metrics, stale ages and attitude match the flight.
+# clock ScaledClock(1): real time / ScaledClock(N): N times faster / SimClock: as fast as possible
+class FlightReplay:
+
+    def __init__(self, path, clock, start=0.0):
+        self.log = FlightLog(path)
+        self.handle = REPLAY_HANDLERS[self.log.protocol]
+        self.clock = clock
+        self.start = start
+        self.t = start          # flight time replayed so far
+        self.frames = 0
+        self.done = False
+        self.it = self.log.frames(start)
+        self.pending = next(self.it, None)
+
+    # Store every frame up to flight time t (caller paced, deterministic)
+    def run_until(self, t):
+        frame = self.pending
+        while frame is not None and frame[0] <= t:
+            self.handle(frame[1], frame[2], frame[0])
+            self.frames += 1
+            frame = next(self.it, None)
+        self.pending = frame
+        self.t = max(self.t, t)
+        self.done = frame is None
+        return not self.done
+
+    # Replay whole log paced by clock (thread target)
+    def run(self):
+        while self.pending is not None:
+            self.clock.sleep(self.pending[0] - self.clock.now())
+            self.run_until(max(self.pending[0], self.clock.now()))
+        self.done = True
+
+
+# ---------------------------- Recording Reader ----------------------------------------
+
+# Thread target (same usage as MSP_Read_pi.main, frames are also recorded to RECORDER_FILE)
+def main(port=None, baudrate=None):
+    recorder = FlightRecorder(RECORDER_FILE, TELEMETRY_PROTOCOL) if RECORDER_FILE else None
+    try:
+        MSP_Read_pi.main(port, baudrate, recorder)
+    finally:
+        if recorder:
+            recorder.close()
+
+
+# python MSP_Record_pi.py [port]  (log file: OPENCOCKPIT_RECORD)
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,312 @@
+import os
+import pty
+import math
+import random
+import selectors
+import sys
+import threading
+import time
+import tty
+
+import MSP_Read_pi
+from MSP_Read_pi import (MSPStreamParser, encode_msp_v1, encode_msp_v2, gps_distance_bearing,
+                         MSP_MESSAGES, MSP_RESPONSE_SIZE, MSP_MULTIPLE_MSP, MSP_V2, RC_CHANNELS, BAUDRATE)
+
+# ---------------------------- Base Configuration ----------------------------------------
+
+# Select scripted flight
+# "circle" : orbit around home (banked turn, slow climb / descent)
+# "script" : keyframes of SIM_SCRIPT, linearly interpolated
+# "zero"   : zero payloads (link tests only)
+SIM_TRAJECTORY = "circle"
+
+# Link faults
+SIM_LATENCY = 0.0005    # sec, FC processing time per request
+SIM_JITTER = 0.001      # sec, extra random delay per reply (0 ~ SIM_JITTER)
+SIM_ERROR_RATE = 0.0    # corrupted bytes per reply byte (one byte of a reply is changed)
+SIM_DROP_RATE = 0.0     # share of requests that get no reply
+SIM_DROPOUTS = ()       # (start, duration) sec windows where the FC does not answer at all
+SIM_SEED = 1
+
+# Home position and orbit
+SIM_HOME = (36.45325, 127.40603)
+SIM_RADIUS = 300.0      # m
+SIM_SPEED = 25.0        # m/s
+SIM_ALT = 120.0         # m
+
+# Battery (4S 1500 mAh)
+SIM_CELLS = 4
+SIM_CAPACITY_MAH = 1500
+SIM_RESISTANCE = 0.02   # Ohm, pack internal resistance
+
+# Keyframes of "script" trajectory: (sec, {field: value}), fields not given keep their last value
+SIM_SCRIPT = (
+    (0.0,   {"alt": 0.0, "speed": 0.0, "throttle": 1000, "pitch": 0.0, "roll": 0.0, "yaw": 45,
+             "lat": SIM_HOME[0], "lon": SIM_HOME[1]}),
+    (5.0,   {"alt": 0.0, "speed": 15.0, "throttle": 1800, "pitch": 15.0}),
+    (20.0,  {"alt": 150.0, "speed": 25.0, "throttle": 1600, "pitch": 5.0,
+             "lat": SIM_HOME[0] + 0.003, "lon": SIM_HOME[1] + 0.003}),
+    (25.0,  {"roll": 40.0, "yaw": 135}),
+    (30.0,  {"roll": 0.0, "yaw": 225}),
+    (60.0,  {"alt": 80.0, "pitch": -5.0, "throttle": 1400, "lat": SIM_HOME[0], "lon": SIM_HOME[1]}),
+    (70.0,  {"alt": 0.0, "speed": 0.0, "throttle": 1000, "pitch": 0.0}),
+)
+
+# Gravity for turn bank angle
+G = 9.81
+
+
+# ---------------------------- Trajectories ----------------------------------------
+
+# Scripted flight: state(t) returns {telemetry field: value} at simulator time t
+# Subclasses give the flight (attitude, position, speed, throttle), the battery,
+# home vector, GPS and RC fields are filled in here.
+class Trajectory:
+
+    def __init__(self, home=SIM_HOME):
+        self.home = home
+        self.t = 0.0
+        self.mah = 0.0
+
+    def flight(self, t):
+        raise NotImplementedError
+
+    def state(self, t):
+        s = self.flight(t)
+        throttle = s.get("throttle", 1500)
+        current = 1.0 + 40.0 * max(0.0, throttle - 1000) / 1000.0
+
+        # Battery (mAh integrated between calls, voltage sags with current)
+        if t > self.t:
+            self.mah += current * (t - self.t) / 3.6
+            self.t = t
+        rest = SIM_CELLS * (4.2 - 0.9 * min(1.0, self.mah / SIM_CAPACITY_MAH))
+        s.update(vbat=rest - SIM_RESISTANCE * current, current=current, mah=self.mah)
+
+        dist, bearing = gps_distance_bearing(s["lat"], s["lon"], self.home[0], self.home[1])
+        s.update(home_dist=dist, home_dir=round(bearing) % 360, sats=14, gps_alt=s["alt"],
+                 air_speed=s["speed"], rssi=900, yaw=round(s["yaw"]) % 360, course=s["yaw"] % 360)
+        for ch in RC_CHANNELS:
+            s[ch] = 1500
+        s["rc3"] = s["throttle"] = throttle
+        return s
+
+# Orbit around home at constant speed (clockwise seen from above)
+class CircleTrajectory(Trajectory):
+
+    def __init__(self, radius=SIM_RADIUS, speed=SIM_SPEED, alt=SIM_ALT, home=SIM_HOME):
+        super().__init__(home)
+        self.radius = radius
+        self.speed = speed
+        self.alt = alt
+
+    def flight(self, t):
+        a = self.speed * t / self.radius
+        v_speed = 2.0 * math.cos(0.1 * t)
+        return {
+            "lat": self.home[0] + math.degrees(self.radius * math.cos(a) / 6371000.0),
+            "lon": self.home[1] + math.degrees(self.radius * math.sin(a) / 6371000.0 / math.cos(math.radians(self.home[0]))),
+            "alt": self.alt + 20.0 * math.sin(0.1 * t),
+            "v_speed": v_speed,
+            "speed": self.speed,
+            "roll": math.degrees(math.atan(self.speed ** 2 / (G * self.radius))),
+            "pitch": math.degrees(math.atan2(v_speed, self.speed)),
+            "yaw": math.degrees(a) + 90.0,
+            "throttle": 1550 + 100 * math.sin(0.1 * t),
+        }
+
+# Keyframes linearly interpolated (held after the last keyframe)
+class KeyframeTrajectory(Trajectory):
+
+    def __init__(self, keyframes=SIM_SCRIPT, home=SIM_HOME):
+        super().__init__(home)
+        # Complete every keyframe with the last value of each field
+        self.times = []
+        self.frames = []
+        last = {}
+        for t, fields in keyframes:
+            last = dict(last, **fields)
+            self.times.append(t)
+            self.frames.append(last)
+
+    def flight(self, t):
+        k = 0
+        while k + 1 < len(self.times) and self.times[k + 1] <= t:
+            k += 1
+        a = self.frames[k]
+        if k + 1 == len(self.times) or t <= self.times[k]:
+            s = dict(a)
+            s["v_speed"] = 0.0
+            return s
+        b = self.frames[k + 1]
+        f = (t - self.times[k]) / (self.times[k + 1] - self.times[k])
+        s = {name: a[name] + (b.get(name, a[name]) - a[name]) * f for name in a}
+        s["v_speed"] = (b.get("alt", a["alt"]) - a["alt"]) / (self.times[k + 1] - self.times[k])
+        return s
+
+# Trajectory by name (None: zero payloads)
+def make_trajectory(name=None):
+    if name is None:
+        name = SIM_TRAJECTORY
+    if name == "circle":
+        return CircleTrajectory()
+    if name == "script":
+        return KeyframeTrajectory()
+    return None
+
+
+# ---------------------------- Simulated FC ----------------------------------------
+
+# Serial-like wrapper of a raw file descriptor (for MSPStreamParser.fill())
+class FdPort:
+
+    def __init__(self, fd):
+        self.fd = fd
+
+    @property
+    def in_waiting(self):
+        return 4096
+
+    def readinto(self, out):
+        try:
+            return os.readv(self.fd, [out])
+        except OSError:     # nothing waiting, or other side closed
+            return 0
+
+# Pseudo-terminal FC answering MSP v1 / v2 requests (port: slave device for serial.Serial)
+# Replies use the version of the request and carry the trajectory state at request time,
+# commands without a known reply get an MSP error reply ("!").
+# A pty has no baudrate, so each reply is held back until the request and reply
+# would have crossed a real UART (10 bits per byte), plus latency and random jitter.
+# Faults: drop_rate / dropouts (no reply), error_rate (one changed byte per corrupted reply).
+class SimFC:
+
+    def __init__(self, baudrate=BAUDRATE, trajectory=None, latency=SIM_LATENCY, jitter=SIM_JITTER,
+                 error_rate=SIM_ERROR_RATE, drop_rate=SIM_DROP_RATE, dropouts=SIM_DROPOUTS, seed=SIM_SEED):
+        self.master, slave = pty.openpty()
+        tty.setraw(self.master)
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        self.slave = slave
+        self.byte_time = 10.0 / baudrate
+        self.trajectory = trajectory
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.dropouts = dropouts
+        self.rnd = random.Random(seed)
+        self.t0 = MSP_Read_pi.clock.now()
+
+        # Counters
+        self.requests = 0
+        self.replies = 0
+        self.dropped = 0
+        self.corrupted = 0
+        self.errors = 0
+
+        self.running = True
+        os.set_blocking(self.master, False)
+        threading.Thread(target=self.run, daemon=True).start()
+
+    # Reply payload of a command (None: unknown command)
+    def reply_payload(self, cmd, p, state):
+        if cmd == MSP_MULTIPLE_MSP:
+            payload = bytearray()
+            for sub in p:
+                data = self.reply_payload(sub, b"", state) or b""
+                payload.append(len(data))
+                payload += data
+            return bytes(payload)
+        size = MSP_RESPONSE_SIZE.get(cmd)
+        msg = MSP_MESSAGES.get(cmd)
+        if state is not None and msg is not None:
+            return msg.encode(state, size or 0)
+        return None if size is None else bytes(size)
+
+    # Reply frame in request version ("!" error frame when payload is None)
+    def reply_frame(self, cmd, payload, version):
+        if payload is None:
+            self.errors += 1
+        frame = (encode_msp_v2 if version == MSP_V2 else encode_msp_v1)(cmd, payload or b"")
+        frame[2] = 0x21 if payload is None else 0x3E
+        return bytes(frame)
+
+    # FC does not answer (random drop or scripted dropout)
+    def is_dropped(self, t):
+        if self.drop_rate and self.rnd.random() < self.drop_rate:
+            return True
+        return any(start <= t < start + duration for start, duration in self.dropouts)
+
+    def run(self):
+        parser = MSPStreamParser(direction=0x3C)        # "<" requests
+        port = FdPort(self.master)
+        sel = selectors.DefaultSelector()
+        sel.register(self.master, selectors.EVENT_READ)
+        cache = {}          # reply frames of zero payload FC
+        t_wire = 0.0        # time the simulated UART is free again
+        while self.running:
+            if not sel.select(0.1):
+                continue
+            parser.fill(port)
+            for cmd, p in parser.frames():
+                if p is None:       # "!" frame is not a request
+                    continue
+                now = MSP_Read_pi.clock.now()
+                t = now - self.t0
+                self.requests += 1
+                if self.is_dropped(t):
+                    self.dropped += 1
+                    t_wire = max(t_wire, now) + (len(p) + 6) * self.byte_time
+                    continue
+
+                if self.trajectory is None:
+                    key = (bytes(p) if cmd == MSP_MULTIPLE_MSP else cmd, parser.version)
+                    frame = cache.get(key)
+                    if frame is None:
+                        frame = cache[key] = self.reply_frame(cmd, self.reply_payload(cmd, p, None), parser.version)
+                else:
+                    state = self.trajectory.state(t)
+                    frame = self.reply_frame(cmd, self.reply_payload(cmd, p, state), parser.version)
+
+                t_wire = max(t_wire, now) + (len(p) + 6 + len(frame)) * self.byte_time
+                delay = t_wire + self.latency - MSP_Read_pi.clock.now()
+                if self.jitter:
+                    delay += self.rnd.uniform(0.0, self.jitter)
+                MSP_Read_pi.clock.sleep(delay)
+
+                if self.error_rate and self.rnd.random() < self.error_rate * len(frame):
+                    frame = bytearray(frame)
+                    frame[self.rnd.randrange(len(frame))] ^= self.rnd.randrange(1, 256)
+                    self.corrupted += 1
+                os.write(self.master, frame)
+                self.replies += 1
+        os.close(self.master)
+
+    # "requests, replies, dropped, corrupted, errors" line
+    def summary(self):
+        return (f"requests {self.requests} replies {self.replies} dropped {self.dropped} "
+                f"corrupted {self.corrupted} errors {self.errors}")
+
+    def close(self):
+        self.running = False
+        os.close(self.slave)
+
+
+# python MSP_Sim_pi.py [circle | script | zero] [baudrate]
+# Then run the cockpit on the printed port, e.g. OPENCOCKPIT_PORT=/dev/pts/3 python3 main.py
+def main():
+    name = sys.argv[1] if len(sys.argv) > 1 else SIM_TRAJECTORY
+    baudrate = int(sys.argv[2]) if len(sys.argv) > 2 else BAUDRATE
+    fc = SimFC(baudrate, make_trajectory(name))
+    print(f"FC simulator on {fc.port} ({baudrate} baud, trajectory: {name})")
+    try:
+        while True:
+            time.sleep(5)
+            print(fc.summary())
+    except KeyboardInterrupt:
+        fc.close()
+
+
+if __name__ == "__main__":
+    main()
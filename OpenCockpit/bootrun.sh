@@ -10,4 +10,10 @@ sleep 1
 # Select one mode
 # main.py : Read and display real MSP data of Flight Controller / main_demo.py : Generate virtual MSP data to display demo
 sudo python3 /boot/firmware/OpenCockpit/main.py &
-#sudo python3 /boot/firmware/OpenCockpit/main_demo.py &
\ No newline at end of file
+# main.py with FC MSP port / baudrate (default /dev/ttyS0 115200, find the fastest reliable rate with MSP_Bench_pi.py link)
+#sudo OPENCOCKPIT_PORT=/dev/ttyAMA0 OPENCOCKPIT_BAUD=460800 python3 /boot/firmware/OpenCockpit/main.py &
+# main.py with flight recorder (every received frame to a binary log, replay with main_demo.py)
+#sudo OPENCOCKPIT_RECORD=/boot/firmware/OpenCockpit/flight.rec python3 /boot/firmware/OpenCockpit/main.py &
+#sudo python3 /boot/firmware/OpenCockpit/main_demo.py &
+# main_demo.py replaying a recorded flight (speed 1 = real time, N = N times faster, 0 = render benchmark)
+#sudo OPENCOCKPIT_REPLAY=/boot/firmware/OpenCockpit/flight.rec OPENCOCKPIT_REPLAY_SPEED=1 python3 /boot/firmware/OpenCockpit/main_demo.py &
\ No newline at end of file
@@ -9,6 +9,8 @@ import numpy as np
 
 # 모듈 임포트
 import MSP_Read_pi
+import MSP_Async_pi
+import MSP_Record_pi
 import HUD_pi_114
 import HUD_pi_085
 import MFD_pi_096
@@ -57,8 +59,14 @@ MODULE_MAP = {
     "INFO_0.96" : INFO_pi_096
 }
 
+# Select MSP reader
+# "sync"  : MSP_Read_pi (scheduled request loop)
+# "async" : MSP_Async_pi (asyncio client, concurrent requests with timeout/retry)
+# (sync reader also records the flight when OPENCOCKPIT_RECORD is set, see MSP_Record_pi)
+MSP_READER = "sync"
+
 # Set framerate config
-HIGH_FPS = 30
+HIGH_FPS = 60   # HUD (attitude is interpolated between MSP samples, see MSP_Read_pi.ATTITUDE_MODE)
 LOW_FPS = 15
 
 # Init SPI bus
@@ -146,10 +154,9 @@ def rgb888_to_rgb565(raw, width, height):
     rgb565 = (r << 11) | (g << 5) | b
     return rgb565.byteswap().tobytes()
 
-# Get MSP data snapshot safely (Prevent data flow interruption in multi-threading environment)
-def get_msp_snapshot():
-    with MSP_Read_pi.data_lock:
-        return dict(MSP_Read_pi.data)
+# Get MSP data snapshot (copy telemetry into preallocated record without blocking the MSP thread)
+def get_msp_snapshot(record):
+    return MSP_Read_pi.telemetry.read_into(record)
 
 # Thread target: render and draw display loop for each module
 def display_loop(module, disp, width, height, fps):
@@ -159,7 +166,7 @@ def display_loop(module, disp, width, height, fps):
     module.WIDTH, module.HEIGHT = width, height
     module.CENTER_X, module.CENTER_Y = width / 2, height / 2
 
-    clock = pygame.time.Clock()
+    clock = MSP_Read_pi.FrameClock()
 
     # Render fixed components
     if hasattr(module, "render_mfd_fixed"):
@@ -167,39 +174,49 @@ def display_loop(module, disp, width, height, fps):
     if hasattr(module, "render_info_fixed"):
         module.render_info_fixed()
 
+    record = MSP_Read_pi.TelemetryRecord()
+    last_version = None
+
+    # HUD renders attitude from estimator every frame (smooth motion above MSP rate)
+    smooth = hasattr(module, "render_hud") and MSP_Read_pi.ATTITUDE_MODE != "off"
+    last_attitude = None
+
+    # Wake up only when a rendered topic changes (fps stays the upper bound)
+    sub = MSP_Read_pi.telemetry.subscribe(*getattr(module, "TELEMETRY_TOPICS", MSP_Read_pi.TOPICS))
+    stale_redraw = getattr(module, "STALE_REDRAW", None)    # modules showing stale marks redraw when idle
+    wait = False    # first frame is always rendered (no telemetry yet when the link is down)
+
     # Render dynamic components
     while True:
         clock.tick(fps)
 
-        snap = get_msp_snapshot()
-
-        # Extract fields with None fallback
-        pitch = snap["pitch"] if snap["pitch"] is not None else 0.0
-        roll  = snap["roll"]  if snap["roll"]  is not None else 0.0
-        yaw   = snap["yaw"]   if snap["yaw"]   is not None else 0.0
-        alt = snap["alt"] if snap["alt"] is not None else 0.0
-        lat = snap["lat"] if snap["lat"] is not None else 36.45325
-        lon = snap["lon"] if snap["lon"] is not None else 127.40603
-        v_speed = snap["v_speed"] if snap["v_speed"] is not None else 0.0
-        speed_3d = snap["speed_3d"] if snap["speed_3d"] is not None else 0.0
-        sats = snap["sats"] if snap["sats"] is not None else 0
-        course = snap["course"] if snap["course"] is not None else 0
-        vbat = snap["vbat"] if snap["vbat"] is not None else 0.0
-        current = snap["current"] if snap["current"] is not None else 0.0
-        rssi = snap["rssi"] if snap["rssi"] is not None else 0.0
-        throttle = snap["throttle"] if snap["throttle"] is not None else 0.0
-        home_dist = snap["home_dist"] if snap["home_dist"] is not None else 0
-        home_dir = snap["home_dir"] if snap["home_dir"] is not None else 0
+        # Sleep until telemetry changes (smooth HUD only once its attitude stopped moving)
+        if wait and not sub.wait(stale_redraw):
+            last_version = None
+
+        # Skip rendering when nothing changed since last frame
+        version = MSP_Read_pi.telemetry.version()
+        att = MSP_Read_pi.attitude.attitude_now() if smooth else None
+        if version == last_version and att == last_attitude:
+            wait = True
+            continue
+        wait = not smooth
+
+        if version != last_version:
+            last_version = get_msp_snapshot(record)
+        if att is not None:
+            record.roll, record.pitch, record.yaw = att
+        last_attitude = att
 
         # Call rendering function by module
         if hasattr(module, "render_hud"):
-            module.render_hud(pitch, roll, yaw, v_speed, alt, speed_3d, sats, course, vbat, current, home_dist, home_dir)
+            module.render_hud(record)
         elif hasattr(module, "render_mfd_dynamic"):
-            module.render_mfd_dynamic(pitch, roll, yaw, v_speed, alt, speed_3d, sats, course, vbat, current, home_dist, home_dir)
+            module.render_mfd_dynamic(record)
         elif hasattr(module, "render_map"):
-            module.render_map(yaw, v_speed, alt, lat, lon, speed_3d, sats, course, vbat, current, home_dist, home_dir)
+            module.render_map(record)
         elif hasattr(module, "render_info_dynamic"):
-            module.render_info_dynamic(vbat, current, rssi, throttle)
+            module.render_info_dynamic(record)
 
         if module == HUD_pi_114 or module == HUD_pi_085:    # Flip screen vertically (enable with reflect screen) 
             #flipped = flip_surface_vertical(module.screen)
@@ -221,7 +238,13 @@ def display_loop(module, disp, width, height, fps):
 def main():
 
     # Start MSP reading thread
-    threading.Thread(target=MSP_Read_pi.main, daemon=True).start()
+    if MSP_READER == "async":
+        msp_main = MSP_Async_pi.main
+    elif MSP_Record_pi.RECORDER_FILE:
+        msp_main = MSP_Record_pi.main
+    else:
+        msp_main = MSP_Read_pi.main
+    threading.Thread(target=msp_main, daemon=True).start()
 
     pygame.init()
     Display_thread_lists = []
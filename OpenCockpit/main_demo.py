@@ -1,6 +1,7 @@
 import threading
 import time
 import sys
+import os
 import math
 import pygame
 import board
@@ -9,6 +10,8 @@ import busio
 import numpy as np
 
 # Import display modules
+import MSP_Read_pi
+import MSP_Record_pi
 import HUD_pi_114
 import HUD_pi_085
 import MFD_pi_096
@@ -61,6 +64,16 @@ MODULE_MAP = {
 HIGH_FPS = 30
 LOW_FPS = 15
 
+# Select demo data source
+# REPLAY_FILE ""   : virtual data (virtual_MSP_data)
+# REPLAY_FILE path : recorded flight (MSP_Record_pi flight recorder) through the telemetry store
+# REPLAY_SPEED 1 : real time / N : N times faster / 0 : as fast as possible (render benchmark)
+REPLAY_FILE = os.environ.get("OPENCOCKPIT_REPLAY", "")
+REPLAY_SPEED = float(os.environ.get("OPENCOCKPIT_REPLAY_SPEED", 1.0))
+REPLAY_START = 0.0      # sec, flight time to start from
+
+replay = None
+
 # Init SPI bus
 spi = busio.SPI(board.SCK, MOSI=board.MOSI)
 
@@ -146,12 +159,12 @@ def rgb888_to_rgb565(raw, width, height):
     rgb565 = (r << 11) | (g << 5) | b
     return rgb565.byteswap().tobytes()
 
-t_init = time.time()
+t_init = MSP_Read_pi.clock.now()
 
 # Generate virtual MSP data for testing
-def virtual_MSP_data():
+def virtual_MSP_data(record):
 
-    t = time.time()
+    t = MSP_Read_pi.clock.now()
     dt = t - t_init
 
     # Generate virtual MSP data values
@@ -171,62 +184,139 @@ def virtual_MSP_data():
     throttle = 1700 + math.sin(dt * 1) * 200
     home_dist = 512 + int(math.sin(dt * 1) * 5)
     home_dir = 45 + (int(dt * 10) % 360)
-    return pitch, roll, yaw, v_speed, alt, lat, lon, speed_3d, sats, course, vbat, current, rssi, throttle, home_dist, home_dir
-
-# Thread target: render and draw display loop for each module
-def display_loop(module, disp, width, height, fps=HIGH_FPS):
-
-    # Get pygame screen elements from each module
+    record.set(pitch=pitch, roll=roll, yaw=yaw, v_speed=v_speed, alt=alt, lat=lat, lon=lon, speed_3d=speed_3d, sats=sats, course=course, vbat=vbat, current=current, rssi=rssi, throttle=throttle, home_dist=home_dist, home_dir=home_dir)
+
+# Get replayed telemetry snapshot (HUD attitude is interpolated at replayed time)
+def get_replay_snapshot(module, record):
+    MSP_Read_pi.telemetry.read_into(record)
+    if hasattr(module, "render_hud") and MSP_Read_pi.ATTITUDE_MODE != "off":
+        att = MSP_Read_pi.attitude.attitude_now()
+        if att is not None:
+            record.roll, record.pitch, record.yaw = att
+
+# Get pygame screen elements of module and render fixed components
+def setup_module(module, width, height):
     module.screen = pygame.Surface((width, height))
     module.WIDTH, module.HEIGHT = width, height
     module.CENTER_X, module.CENTER_Y = width / 2, height / 2
 
-    clock = pygame.time.Clock()
-
-    # Render fixed components
     if hasattr(module, "render_mfd_fixed"):
         module.render_mfd_fixed()
     if hasattr(module, "render_info_fixed"):
         module.render_info_fixed()
 
+# Render dynamic components of module into its screen
+def render_module(module, record):
+    # Call module-render functions by name
+    if hasattr(module, "render_hud"):
+        module.render_hud(record)
+    elif hasattr(module, "render_mfd_dynamic"):
+        module.render_mfd_dynamic(record)
+    elif hasattr(module, "render_map"):
+        module.render_map(record)
+    elif hasattr(module, "render_info_dynamic"):
+        module.render_info_dynamic(record)
+
+    if module == HUD_pi_114 or module == HUD_pi_085:    # Flip screen vertically (enable with reflect screen) 
+        #flipped = flip_surface_vertical(module.screen)
+        #raw = pygame.image.tostring(flipped, "RGB")
+        pass
+    elif module == MFD_pi_096 or module == INFO_pi_096:  # Set surface order and send to display
+        module.screen.blit(module.background_surface, (0,0))    # bottom surface
+        module.screen.blit(module.dynamic_surface, (0,0))
+        module.screen.blit(module.fixed_surface, (0,0))         # top surface
+
+# Send module screen to display
+def draw_display(module, disp, width, height):
+    # Get pygame surface data
+    raw = pygame.image.tostring(module.screen, "RGB")
+    # Convert RGB888 to RGB565
+    buf = rgb888_to_rgb565(raw, width, height)
+    # Display update (block write)
+    disp._block(0, 0, width - 1, height - 1, buf)
+
+# Thread target: render and draw display loop for each module
+def display_loop(module, disp, width, height, fps=HIGH_FPS):
+
+    setup_module(module, width, height)
+    # Displays refresh in wall time (module clock runs N times faster in replay)
+    clock = MSP_Read_pi.FrameClock(MSP_Read_pi.SystemClock())
+    record = MSP_Read_pi.TelemetryRecord()
+
     # Render dynamic components
     while True:
         clock.tick(fps)
 
-        # get virtual data for testing
-        pitch, roll, yaw, v_speed, alt, lat, lon, speed_3d, sats, course, vbat, current, rssi, throttle, home_dist, home_dir = virtual_MSP_data()
-
-        # Call module-render functions by name
-        if hasattr(module, "render_hud"):
-            module.render_hud(pitch, roll, yaw, v_speed, alt, speed_3d, sats, course, vbat, current, home_dist, home_dir)
-        elif hasattr(module, "render_mfd_dynamic"):
-            module.render_mfd_dynamic(pitch, roll, yaw, v_speed, alt, speed_3d, sats, course, vbat, current, home_dist, home_dir)
-        elif hasattr(module, "render_map"):
-            module.render_map(yaw, v_speed, alt, lat, lon, speed_3d, sats, course, vbat, current, home_dist, home_dir)
-        elif hasattr(module, "render_info_dynamic"):
-            module.render_info_dynamic(vbat, current, rssi, throttle)
-
-        if module == HUD_pi_114 or module == HUD_pi_085:    # Flip screen vertically (enable with reflect screen) 
-            #flipped = flip_surface_vertical(module.screen)
-            #raw = pygame.image.tostring(flipped, "RGB")
-            pass
-        elif module == MFD_pi_096 or module == INFO_pi_096:  # Set surface order and send to display
-            module.screen.blit(module.background_surface, (0,0))    # bottom surface
-            module.screen.blit(module.dynamic_surface, (0,0))
-            module.screen.blit(module.fixed_surface, (0,0))         # top surface
-
-        # Get pygame surface data
-        raw = pygame.image.tostring(module.screen, "RGB")
-        # Convert RGB888 to RGB565
-        buf = rgb888_to_rgb565(raw, width, height)
-        # Display update (block write)
-        disp._block(0, 0, width - 1, height - 1, buf)
+        # get replayed flight or virtual data for testing
+        if replay:
+            get_replay_snapshot(module, record)
+        else:
+            virtual_MSP_data(record)
+
+        render_module(module, record)
+        draw_display(module, disp, width, height)
+
+# Replay whole flight on the simulated clock, rendering every display frame at flight time
+# (no wall clock waits, so the same log always renders bit-identical frames)
+# and print render / draw cost per module (over: frames longer than the frame period)
+def replay_benchmark(displays):
+    record = MSP_Read_pi.TelemetryRecord()
+    for mod_key, module, disp, width, height, fps in displays:
+        setup_module(module, width, height)
+
+    clock = MSP_Read_pi.clock
+    frame_clock = MSP_Read_pi.FrameClock(clock)
+    max_fps = max(d[5] for d in displays)
+    t_next = [clock.now()] * len(displays)
+    render_cost = [[] for _ in displays]
+    draw_cost = [[] for _ in displays]
+    over = [0] * len(displays)
+    t_start = time.perf_counter()
+
+    while not replay.done:
+        frame_clock.tick(max_fps)       # steps simulated time by one frame
+        t = clock.now()
+        replay.run_until(t)
+        for i, (mod_key, module, disp, width, height, fps) in enumerate(displays):
+            if t < t_next[i]:
+                continue
+            t_next[i] += 1.0 / fps
+            t0 = time.perf_counter()
+            get_replay_snapshot(module, record)
+            render_module(module, record)
+            t1 = time.perf_counter()
+            draw_display(module, disp, width, height)
+            t2 = time.perf_counter()
+            render_cost[i].append(t1 - t0)
+            draw_cost[i].append(t2 - t1)
+            if t2 - t0 > 1.0 / fps:
+                over[i] += 1
+
+    wall = time.perf_counter() - t_start
+    flight = clock.now() - replay.start
+    print(f"--- Replayed {flight:.0f} s of flight ({replay.frames} frames) in {wall:.1f} s ({flight / wall:.1f}x) ---")
+    print("%-10s %7s %12s %12s %12s %6s" % ("module", "frames", "render mean", "render max", "draw mean", "over"))
+    for (mod_key, *_), render, draw, n_over in zip(displays, render_cost, draw_cost, over):
+        if render:
+            print("%-10s %7d %10.2fms %10.2fms %10.2fms %6d" % (mod_key, len(render), sum(render) / len(render) * 1000,
+                                                                 max(render) * 1000, sum(draw) / len(draw) * 1000, n_over))
 
 # Run
 def main():
+    global replay
 
     pygame.init()
     Display_thread_lists = []
+    displays = []
+
+    # Replay source (frames go through the same telemetry store as MSP_Read_pi.main)
+    if REPLAY_FILE:
+        if REPLAY_SPEED > 0:
+            clock = MSP_Read_pi.ScaledClock(REPLAY_SPEED, REPLAY_START)
+        else:
+            clock = MSP_Read_pi.SimClock(REPLAY_START)
+        replay = MSP_Record_pi.FlightReplay(REPLAY_FILE, MSP_Read_pi.set_clock(clock), REPLAY_START)
+        print(f"Replay: {REPLAY_FILE} ({replay.log.protocol}, {replay.log.duration} s, speed {REPLAY_SPEED or 'max'})")
 
     print("--- Display Initialization Start ---")
 
@@ -256,15 +346,26 @@ def main():
             else:
                 fps = LOW_FPS
 
-            # Start display render and draw loop
-            loop = threading.Thread(target=display_loop, args=(module_obj, disp_hw, width, height, fps), daemon=True)
-            loop.start()
-            Display_thread_lists.append(loop)
+            displays.append((mod_key, module_obj, disp_hw, width, height, fps))
             print(f"Success: {disp_id} initialized with {mod_key}")
             
         except Exception as e:
             print(f"Failed to init {disp_id} ({mod_key}): {e}")
 
+    # Render benchmark: no threads, every frame rendered in flight time order
+    if replay and REPLAY_SPEED <= 0:
+        if displays:
+            replay_benchmark(displays)
+        sys.exit(0)
+
+    # Start display render and draw loops
+    for display in displays:
+        loop = threading.Thread(target=display_loop, args=display[1:], daemon=True)
+        loop.start()
+        Display_thread_lists.append(loop)
+    if replay:
+        threading.Thread(target=replay.run, daemon=True).start()
+
     print(f"--- {len(Display_thread_lists)} Displays Running ---")
 
     try:
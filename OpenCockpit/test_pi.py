@@ -16,7 +16,7 @@ start_MSP_reading()
 time.sleep(1)
 
 # HUD 1.14인치 메인 루프
-HUD_pi_114.main(MSP_Read_pi.data)
+HUD_pi_114.main(MSP_Read_pi.telemetry)
 
 # HUD 0.85인치 메인 루프
 #HUD_pi_085.main(MSP_Read.data)